@@ -16,14 +16,16 @@ def get_conn():
     return conn
 
 def add_business_days(start_date: date, days: int) -> date:
-    """Adiciona dias úteis (segunda a sexta) a uma data."""
-    current = start_date
-    added = 0
-    while added < days:
-        current += timedelta(days=1)
-        if current.weekday() < 5:  # 0=Mon, 4=Fri
-            added += 1
-    return current
+    """Adiciona dias úteis (segunda a sexta) a uma data, em tempo constante."""
+    if days <= 0:
+        return start_date
+    weekday = start_date.weekday()  # 0=Mon, 4=Fri
+    friday_shift = max(weekday - 4, 0)  # Sáb/Dom contam como a sexta anterior
+    weeks, remainder = divmod(days, 5)
+    offset = weeks * 7 + remainder - friday_shift
+    if weekday - friday_shift + remainder >= 5:
+        offset += 2  # O resto atravessa um fim de semana
+    return start_date + timedelta(days=offset)
 
 def compute_due_date(start_iso: str, days_limit: int, is_business: bool) -> str:
     """Calcula data de vencimento a partir de start_iso (YYYY-MM-DD)."""
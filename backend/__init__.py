@@ -3,7 +3,10 @@ Backend do Sistema PGR - Processos Administrativos
 
 Este pacote contém toda a lógica de backend do sistema:
 - api_sqlalchemy.py: API REST com FastAPI
+- api_async.py: Endpoints de leitura assíncronos (PGR_ASYNC_DB=1, requer aiosqlite)
 - models_sqlalchemy.py: Modelos do banco de dados (ORM)
+- events.py: Feed de eventos em tempo real (Server-Sent Events)
+- business_calendar.py: Dias úteis e calendário de feriados (prazos legais)
 - seed_sqlalchemy.py: Script para popular dados iniciais
 
 Para rodar o servidor:
@@ -0,0 +1,266 @@
+"""
+Modo assíncrono da API - Sistema PGR
+
+Versões async dos endpoints de leitura de api_sqlalchemy.py usando a
+AsyncEngine do SQLAlchemy com o driver aiosqlite.
+
+No modo padrão cada requisição ocupa uma thread do threadpool do FastAPI
+enquanto espera o banco. No modo assíncrono as leituras aguardam o banco no
+event loop, então um único worker atende muito mais requisições lentas
+simultâneas sem esgotar o threadpool.
+
+Ativação:
+---------
+    pip install aiosqlite
+    PGR_ASYNC_DB=1 uvicorn backend.api_sqlalchemy:app
+
+Com PGR_ASYNC_DB ativo, install_async_routes substitui as rotas GET
+síncronas de mesmo caminho pelas versões deste módulo. As consultas e o
+formato das respostas são os mesmos (helpers compartilhados em
+api_sqlalchemy.py). Escritas, exportação e o feed de eventos continuam
+síncronos: o SQLite serializa as escritas de qualquer forma.
+
+Réplicas de leitura:
+--------------------
+As leituras assíncronas passam pelo mesmo EngineRouter do modo síncrono
+(api_sqlalchemy.request_engine): cada engine síncrona do roteador (primário
+e réplicas de PGR_READ_REPLICAS) ganha uma AsyncEngine equivalente, e as
+réplicas abrem com PRAGMA query_only. O cookie pgr_min_version e o header
+X-Read-Your-Writes valem igual. A escolha da réplica consulta a versão dos
+dados de forma síncrona, então roda no threadpool; sem réplicas, o primário
+é usado direto, sem passar pelo threadpool.
+"""
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from . import api_sqlalchemy as api
+    from . import models_sqlalchemy as models
+except ImportError:
+    import api_sqlalchemy as api
+    import models_sqlalchemy as models
+
+router = APIRouter()
+
+# AsyncEngine de cada engine síncrona do roteador (ver async_engine_for)
+async_engines = {}
+
+
+def async_engine_for(engine):
+    """
+    Retorna a AsyncEngine equivalente a uma engine síncrona do roteador.
+    
+    Criada na primeira chamada; réplicas abrem em modo somente leitura.
+    
+    Args:
+        engine: Engine síncrona (primário ou réplica de api.engine_router)
+    
+    Returns:
+        AsyncEngine apontando para o mesmo banco
+    """
+    if engine not in async_engines:
+        async_engines[engine] = models.get_async_engine(
+            engine.url.render_as_string(hide_password=False), read_only=engine in api.engine_router.replicas
+        )
+    return async_engines[engine]
+
+
+# ============ Dependency Injection ============
+
+async def get_async_db(request: Request):
+    """
+    Fornece uma sessão assíncrona para cada requisição.
+    Garante que a sessão seja fechada corretamente.
+    
+    A engine vem do EngineRouter (primário ou réplica), como em get_db.
+    """
+    if api.engine_router.replicas:
+        engine = await run_in_threadpool(api.request_engine, request)
+    else:
+        engine = api.engine_router.for_write()
+    db = models.get_async_session(async_engine_for(engine))
+    try:
+        yield db  # Injeta a sessão no endpoint
+    finally:
+        await db.close()  # Fecha a sessão após a requisição
+
+
+async def global_etag(db: AsyncSession, per_day: bool = False) -> str:
+    """Versão assíncrona de api_sqlalchemy.global_etag."""
+    version = (await db.execute(models.data_version_select())).scalar()
+    return api.etag_for_version(version or 0, per_day)
+
+
+# ============ Endpoints ============
+
+@router.get("/processes", response_model=api.ProcessPageSchema)
+async def list_processes(
+    request: Request,
+    response: Response,
+    type_code: Optional[str] = Query(None, description="Filtrar por tipo de processo"),
+    status_code: Optional[str] = Query(None, description="Filtrar por status"),
+    limit: int = Query(100, ge=1, le=1000, description="Quantidade máxima de processos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (next_cursor)"),
+    overdue: bool = Query(False, description="Só processos com prazo vencido"),
+    docs_pending: bool = Query(False, description="Só processos com documento obrigatório pendente"),
+    sort: str = Query("created", pattern="^(created|next_due)$", description="created ou next_due"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Versão assíncrona de api_sqlalchemy.list_processes."""
+    etag = await global_etag(db, per_day=overdue)
+    if api.etag_matches(request, etag):
+        return api.not_modified(etag)
+    api.set_etag(response, etag)
+
+    rows = (await db.execute(api.process_page_select(type_code, status_code, limit, cursor,
+                                                     overdue, docs_pending, sort))).all()
+    return api.process_page(rows, limit, sort)
+
+
+@router.get("/processes/search", response_model=List[api.ProcessResponseSchema])
+async def search_processes(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, description="Texto de busca (protocolo, nome, matrícula, parecer, notas)"),
+    limit: int = Query(50, ge=1, le=500, description="Quantidade máxima de resultados"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Versão assíncrona de api_sqlalchemy.search_processes."""
+    etag = await global_etag(db)
+    if api.etag_matches(request, etag):
+        return api.not_modified(etag)
+    api.set_etag(response, etag)
+
+    match = models.build_search_query(q)
+    if not match:
+        return []
+
+    rows = (await db.execute(api.SEARCH_SQL, {"match": match, "limit": limit})).all()
+    return [api.process_summary(row) for row in rows]
+
+
+@router.get("/processes/dashboard")
+async def get_dashboard(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Versão assíncrona de api_sqlalchemy.get_dashboard."""
+    etag = await global_etag(db)
+    if api.etag_matches(request, etag):
+        return api.not_modified(etag)
+    api.set_etag(response, etag)
+
+    # Todos os relacionamentos vêm carregados (process_details_options), então
+    # build_process_details não dispara nenhum lazy load fora do await
+    processes = (await db.execute(
+        api.process_details_select().order_by(models.Process.created_date.desc())
+    )).scalars().all()
+
+    return [api.build_process_details(proc) for proc in processes]
+
+
+@router.get("/processes/{protocol}")
+async def get_process_details(
+    protocol: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Versão assíncrona de api_sqlalchemy.get_process_details."""
+    current = (await db.execute(api.process_version_select(protocol))).first()
+    if current:
+        etag = api.process_etag(current)
+        if api.etag_matches(request, etag):
+            return api.not_modified(etag)
+        api.set_etag(response, etag)
+
+    process = (await db.execute(
+        api.process_details_select().where(models.Process.protocol_number == protocol)
+    )).scalars().first()
+
+    if not process:
+        archived = await db.run_sync(api.archived_process_details, protocol)
+        if archived:
+            return archived
+        raise HTTPException(
+            status_code=404,
+            detail=f"Processo não encontrado: {protocol}"
+        )
+
+    return api.build_process_details(process)
+
+
+@router.get("/deadlines/overdue", response_model=List[api.DeadlineResponseSchema])
+async def list_overdue_deadlines(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Versão assíncrona de api_sqlalchemy.list_overdue_deadlines."""
+    etag = await global_etag(db, per_day=True)
+    if api.etag_matches(request, etag):
+        return api.not_modified(etag)
+    api.set_etag(response, etag)
+
+    today = date.today()
+    overdue = (await db.execute(api.overdue_deadlines_select(today))).all()
+    return [api.overdue_deadline(row, today) for row in overdue]
+
+
+@router.get("/deadlines/upcoming")
+async def list_upcoming_deadlines(
+    request: Request,
+    response: Response,
+    days: int = Query(7, ge=1, le=90, description="Quantidade de dias à frente"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Versão assíncrona de api_sqlalchemy.list_upcoming_deadlines."""
+    etag = await global_etag(db, per_day=True)
+    if api.etag_matches(request, etag):
+        return api.not_modified(etag)
+    api.set_etag(response, etag)
+
+    today = date.today()
+    end_date = today + timedelta(days=days)
+    upcoming = (await db.execute(api.upcoming_deadlines_select(today, end_date))).all()
+    return [api.upcoming_deadline(row, today) for row in upcoming]
+
+
+@router.get("/statistics/summary")
+async def get_statistics(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Versão assíncrona de api_sqlalchemy.get_statistics."""
+    etag = await global_etag(db, per_day=True)
+    if api.etag_matches(request, etag):
+        return api.not_modified(etag)
+    api.set_etag(response, etag)
+
+    processes_stmt, overdue_stmt = api.statistics_selects(date.today())
+    rows = (await db.execute(processes_stmt)).all()
+    overdue_count = (await db.execute(overdue_stmt)).scalar()
+    return api.statistics_summary(rows, overdue_count)
+
+
+# ============ Instalação ============
+
+def install_async_routes(app):
+    """
+    Substitui as rotas GET síncronas pelas versões assíncronas deste módulo.
+
+    Cria já na instalação as AsyncEngines do primário e das réplicas de
+    api.engine_router, para que a falta do aiosqlite apareça no boot.
+
+    Args:
+        app: Aplicação FastAPI
+    """
+    for engine in [api.engine_router.primary, *api.engine_router.replicas]:
+        async_engine_for(engine)
+
+    replaced = {
+        (route.path, method)
+        for route in router.routes
+        for method in route.methods
+    }
+    app.router.routes = [
+        route for route in app.router.routes
+        if not (isinstance(route, APIRoute)
+                and any((route.path, method) in replaced for method in route.methods))
+    ]
+    app.include_router(router)
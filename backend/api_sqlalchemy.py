@@ -23,40 +23,136 @@ Autor: Sistema PGR
 Versão: 2.0.0
 Data: Dezembro 2025
 """
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import delete, func, insert, select, text, tuple_, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Optional, List, Set
 from datetime import date, timedelta
 from pathlib import Path
+from contextlib import asynccontextmanager
+import asyncio
+import base64
+import csv
+import io
+import json
+import logging
+import os
+import time
 
 # Importar models - funciona tanto como módulo quanto como pacote
 try:
     # Quando executado como pacote: python -m backend.api_sqlalchemy
     from . import models_sqlalchemy as models
+    from . import events
+    from .business_calendar import HolidayCalendar, add_business_days, weekday_offsets
 except ImportError:
     # Quando executado diretamente: uvicorn backend.api_sqlalchemy:app
     import models_sqlalchemy as models
+    import events
+    from business_calendar import HolidayCalendar, add_business_days, weekday_offsets
 
 # ============ Configuração da Aplicação ============
 
+# Engine do banco (data/PGR.db ou PGR_DATABASE_URL). Criar a engine não abre
+# conexão; o esquema é conferido no lifespan, antes da primeira requisição.
+engine = models.get_engine()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicialização e encerramento da aplicação.
+    
+    Na subida confere a versão do esquema com uma query e só cria tabelas,
+    índices e triggers se o banco for novo ou estiver desatualizado (ver
+    models.ensure_schema). No encerramento fecha os pools de conexão.
+    """
+    await run_in_threadpool(models.ensure_schema, engine)
+    yield
+    engine_router.dispose()
+
+
 app = FastAPI(
     title="PGR - Sistema de Processos (SQLAlchemy)",
     description="API REST para controle de processos administrativos com ORM",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
-# Inicializar banco de dados na primeira execução
-# O banco ficará em data/PGR.db
-engine = models.get_engine()
-models.create_tables(engine)
+# Roteamento leitura/escrita: GET/HEAD vão para as réplicas de
+# PGR_READ_REPLICAS (se houver), o resto para o primário
+engine_router = models.EngineRouter(engine, [models.get_read_engine(url) for url in models.READ_REPLICA_URLS])
+
+# Modo assíncrono para os endpoints de leitura (requer aiosqlite)
+# Ativar com: PGR_ASYNC_DB=1 (ver backend/api_async.py)
+ASYNC_DB = os.getenv("PGR_ASYNC_DB", "").lower() in ("1", "true", "yes")
 
 # Servir arquivos estáticos (frontend)
 # Caminho relativo à raiz do projeto
 frontend_path = Path(__file__).parent.parent / "frontend"
 app.mount("/pgr", StaticFiles(directory=str(frontend_path), html=True), name="pgr")
 
+# Busca textual no índice FTS5, ordenada por relevância (bm25)
+SEARCH_SQL = text("""
+    SELECT p.id, p.protocol_number, t.code AS type_code, p.applicant_name,
+           p.created_date, s.code AS status_code, p.financial_effective_date,
+           p.required_docs_total, p.required_docs_provided, p.next_due_date, p.open_deadlines
+    FROM processes_fts
+    JOIN processes p ON p.id = processes_fts.rowid
+    JOIN process_types t ON t.id = p.type_id
+    JOIN statuses s ON s.id = p.status_id
+    WHERE processes_fts MATCH :match
+    ORDER BY bm25(processes_fts)
+    LIMIT :limit
+""")
+
+# Linhas buscadas por vez do cursor do banco na exportação
+EXPORT_BATCH_SIZE = 1000
+
+# Quantidade máxima de processos por requisição em POST /processes/batch
+BATCH_MAX_SIZE = 5000
+
+# Processos por transação no job de arquivamento (archive_closed_processes)
+ARCHIVE_CHUNK_SIZE = 1000
+
+# Métodos HTTP atendidos pelas réplicas de leitura
+READ_METHODS = ("GET", "HEAD")
+
+# Ler as próprias escritas: o header força o primário na requisição; o cookie,
+# gravado após cada escrita, guarda a versão que as leituras seguintes precisam ver
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+MIN_VERSION_COOKIE = "pgr_min_version"
+MIN_VERSION_COOKIE_MAX_AGE = 600  # segundos (réplicas devem alcançar o primário antes disso)
+
+# Instrumentação SQL por requisição: headers de resposta e limites a partir dos
+# quais a requisição é registrada no log (warning)
+DB_QUERIES_HEADER = "X-DB-Queries"
+SQL_LOG_MAX_QUERIES = int(os.getenv("PGR_SQL_LOG_MAX_QUERIES", "50"))
+SQL_LOG_MAX_DB_MS = float(os.getenv("PGR_SQL_LOG_MAX_DB_MS", "200"))
+
+logger = logging.getLogger(__name__)
+
+# Eventos que iniciam a contagem de um prazo legal (LegalDeadline.start_event)
+START_CREATED = "created_date"  # Cadastro do processo
+START_DOCUMENT_COMPLETE = "document_complete"  # Último documento obrigatório entregue
+START_STATUS_PREFIX = "status:"  # Mudança para um status (ex.: status:PENDENTE_DOCS)
+
+# Modelos de checklist/prazos por tipo: URL do banco -> (versão de referência,
+# modelos por type_id, modelo padrão). Ver get_process_template.
+_template_cache = {}
+
+# Colunas exportadas (ordem do CSV)
+EXPORT_COLUMNS = [
+    "protocol_number", "type_code", "applicant_name", "applicant_registration",
+    "created_date", "status_code", "parecer", "financial_effective_date",
+    "closed_date", "notes"
+]
+
 
 # ============ Schemas Pydantic (DTOs) ============
 # Schemas definem a estrutura de dados para requisições e respostas
@@ -86,11 +182,126 @@ class ProcessResponseSchema(BaseModel):
     created_date: str
     status_code: str
     financial_effective_date: Optional[str]
+    required_docs_total: int = 0  # Documentos obrigatórios do checklist
+    required_docs_provided: int = 0  # Obrigatórios já apresentados
+    next_due_date: Optional[str] = None  # Vencimento mais próximo entre os prazos em aberto
+    open_deadlines: int = 0  # Prazos em aberto
     
     class Config:
         from_attributes = True  # Permite conversão de modelo SQLAlchemy
 
 
+class ProcessBatchCreateSchema(BaseModel):
+    """
+    Schema para cadastro de processos em lote (POST /processes/batch).
+    """
+    processes: List[ProcessCreateSchema] = Field(..., max_length=BATCH_MAX_SIZE)
+
+
+class ProcessBatchItemSchema(BaseModel):
+    """
+    Resultado do cadastro de uma linha do lote.
+    """
+    index: int  # Posição da linha no lote
+    protocol_number: str
+    result: str  # created, exists ou error
+    id: Optional[int] = None  # ID do processo criado
+    error: Optional[str] = None  # Motivo da rejeição
+
+
+class ProcessBatchResultSchema(BaseModel):
+    """
+    Resumo do cadastro em lote com o resultado de cada linha.
+    """
+    created: int
+    skipped: int  # Protocolos que já existiam
+    errors: int
+    results: List[ProcessBatchItemSchema]
+
+
+class DocumentProvideSchema(BaseModel):
+    """
+    Schema para marcar (ou desmarcar) a entrega de um documento do checklist.
+    """
+    provided: bool = True  # False desfaz a entrega
+    provided_date: Optional[str] = None  # Data da entrega (YYYY-MM-DD, default: hoje)
+    observations: Optional[str] = None  # Observações sobre o documento
+
+
+class ProcessUpdateSchema(BaseModel):
+    """
+    Schema para atualização parcial de processo (PATCH /processes/{protocol}).
+    
+    `version` é a versão do processo lida pelo cliente (campo version dos
+    detalhes); a alteração só é aplicada se ninguém gravou no processo depois.
+    Campos omitidos não são alterados.
+    """
+    version: int  # Versão lida pelo cliente (controle de concorrência otimista)
+    status_code: Optional[str] = None  # Novo status
+    status_date: Optional[str] = None  # Data da mudança de status (YYYY-MM-DD, default: hoje)
+    applicant_name: Optional[str] = None
+    applicant_registration: Optional[str] = None
+    parecer: Optional[str] = None
+    financial_effective_date: Optional[str] = None  # YYYY-MM-DD
+    closed_date: Optional[str] = None  # YYYY-MM-DD
+    notes: Optional[str] = None
+    
+    @field_validator("status_code", "applicant_name")
+    @classmethod
+    def not_null(cls, value):
+        """Campos NOT NULL podem ser omitidos, mas não enviados como null (422)."""
+        if value is None:
+            raise ValueError("não pode ser nulo")
+        return value
+
+
+class StatusTransitionSchema(BaseModel):
+    """
+    Mudança de status de um processo, condicionada à versão lida pelo cliente.
+    """
+    protocol_number: str
+    status_code: str  # Novo status
+    version: int  # Versão lida pelo cliente
+
+
+class StatusTransitionBatchSchema(BaseModel):
+    """
+    Schema para mudança de status em lote (POST /processes/status-transitions).
+    """
+    transitions: List[StatusTransitionSchema] = Field(..., max_length=BATCH_MAX_SIZE)
+    status_date: Optional[str] = None  # Data da mudança (YYYY-MM-DD, default: hoje)
+
+
+class StatusTransitionItemSchema(BaseModel):
+    """
+    Resultado da mudança de status de um processo do lote.
+    """
+    index: int  # Posição no lote
+    protocol_number: str
+    result: str  # updated, conflict, not_found ou error
+    version: Optional[int] = None  # Nova versão (updated) ou versão atual (conflict)
+    error: Optional[str] = None  # Motivo da rejeição
+
+
+class StatusTransitionResultSchema(BaseModel):
+    """
+    Resumo da mudança de status em lote com o resultado de cada processo.
+    """
+    updated: int
+    conflicts: int  # Processos alterados por outra pessoa depois da leitura
+    not_found: int
+    errors: int
+    results: List[StatusTransitionItemSchema]
+
+
+class ProcessPageSchema(BaseModel):
+    """
+    Página de processos com cursor para a próxima página.
+    """
+    items: List[ProcessResponseSchema]
+    next_cursor: Optional[str]  # None quando não há mais páginas
+
+
 class DeadlineResponseSchema(BaseModel):
     """
     Schema de resposta para prazos vencidos.
@@ -105,21 +316,93 @@ class DeadlineResponseSchema(BaseModel):
 
 # ============ Dependency Injection ============
 
-def get_db():
+def request_engine(request: Request):
+    """
+    Escolhe a engine da requisição (primário ou réplica de leitura).
+    
+    Escritas vão sempre para o primário. Leituras vão para uma réplica, a
+    menos que peçam o primário (header X-Read-Your-Writes) ou que o cookie
+    de versão mínima indique uma escrita que a réplica ainda não tem.
+    
+    Args:
+        request: Requisição HTTP
+    
+    Returns:
+        Engine do SQLAlchemy
+    """
+    if request.method not in READ_METHODS or not engine_router.replicas:
+        return engine_router.for_write()
+    if request.headers.get(READ_YOUR_WRITES_HEADER, "").lower() in ("1", "true", "yes"):
+        return engine_router.for_write()
+    try:
+        min_version = int(request.cookies.get(MIN_VERSION_COOKIE, 0))
+    except ValueError:
+        min_version = 0
+    return engine_router.for_read(min_version)
+
+
+def get_db(request: Request):
     """
     Fornece uma sessão de banco de dados para cada requisição.
     Garante que a sessão seja fechada corretamente.
     """
-    db = models.get_session(engine)
+    db = models.get_session(request_engine(request))
     try:
         yield db  # Injeta a sessão no endpoint
     finally:
         db.close()  # Fecha a sessão após a requisição
 
 
+@app.middleware("http")
+async def remember_write_version(request: Request, call_next):
+    """
+    Após uma escrita bem-sucedida, grava no cookie a versão global do primário.
+    
+    As leituras seguintes do mesmo cliente só usam uma réplica que já tenha
+    essa versão (ler as próprias escritas). Sem réplicas, não faz nada.
+    """
+    response = await call_next(request)
+    if engine_router.replicas and request.method not in READ_METHODS and response.status_code < 400:
+        version = await run_in_threadpool(models.EngineRouter.version, engine_router.primary)
+        response.set_cookie(MIN_VERSION_COOKIE, str(version), max_age=MIN_VERSION_COOKIE_MAX_AGE,
+                            httponly=True, samesite="lax")
+    return response
+
+
+@app.middleware("http")
+async def instrument_sql(request: Request, call_next):
+    """
+    Conta statements SQL e tempo de banco da requisição (models.instrument_engine).
+    
+    Responde com X-DB-Queries e Server-Timing (db e total, visíveis nas
+    ferramentas do navegador) e registra no log as requisições acima de
+    SQL_LOG_MAX_QUERIES statements ou SQL_LOG_MAX_DB_MS de banco. Em respostas
+    em streaming (exportação, /events) só entra o que rodou antes do corpo.
+    """
+    stats = models.QueryStats()
+    token = models.query_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        models.query_stats.reset(token)
+    total_ms = (time.perf_counter() - start) * 1000
+    db_ms = stats.duration * 1000
+    
+    response.headers[DB_QUERIES_HEADER] = str(stats.count)
+    response.headers["Server-Timing"] = (
+        f'db;dur={db_ms:.1f};desc="{stats.count} queries", total;dur={total_ms:.1f}'
+    )
+    if stats.count > SQL_LOG_MAX_QUERIES or db_ms > SQL_LOG_MAX_DB_MS:
+        logger.warning("%s %s: %d queries, %.1f ms no banco, %.1f ms no total",
+                       request.method, request.url.path, stats.count, db_ms, total_ms)
+    return response
+
+
 # ============ Funções Auxiliares ============
 
-def calculate_due_date(start_date: date, days: int, business_days: bool = False) -> date:
+def calculate_due_date(start_date: date, days: int, business_days: bool = False,
+                       calendar: Optional[HolidayCalendar] = None) -> date:
     """
     Calcula data de vencimento a partir de uma data inicial.
     
@@ -127,6 +410,7 @@ def calculate_due_date(start_date: date, days: int, business_days: bool = False)
         start_date: Data inicial
         days: Quantidade de dias a adicionar
         business_days: Se True, conta apenas dias úteis (seg-sex)
+        calendar: Calendário de feriados (opcional; sem ele só pula fins de semana)
     
     Returns:
         Data de vencimento calculada
@@ -135,318 +419,2020 @@ def calculate_due_date(start_date: date, days: int, business_days: bool = False)
         # Dias corridos: apenas adiciona
         return start_date + timedelta(days=days)
     
-    # Dias úteis: pula fins de semana
-    current = start_date
-    added = 0
-    while added < days:
-        current += timedelta(days=1)
-        if current.weekday() < 5:  # 0=Segunda, 4=Sexta
-            added += 1
-    return current
+    # Dias úteis: semanas cheias + resto (sem laço dia a dia), menos feriados
+    if calendar is not None:
+        return calendar.add_business_days(start_date, days)
+    return add_business_days(start_date, days)
 
 
-def create_process_checklist(db: Session, process_id: int, type_id: int):
+def calculate_due_dates(start_dates: List[date], days: int, business_days: bool = False,
+                        calendar: Optional[HolidayCalendar] = None) -> List[date]:
     """
-    Cria checklist de documentos para um processo baseado no tipo.
+    Versão em lote de calculate_due_date (no estilo de numpy.busday_offset).
+    
+    Aplica o mesmo prazo a várias datas de início de uma vez, para gerar os
+    prazos de muitos processos (cadastro em lote, recálculo em massa).
     
     Args:
-        db: Sessão do banco
-        process_id: ID do processo
-        type_id: ID do tipo de processo
+        start_dates: Datas iniciais
+        days: Quantidade de dias a adicionar
+        business_days: Se True, conta apenas dias úteis (seg-sex)
+        calendar: Calendário de feriados (opcional; sem ele só pula fins de semana)
+    
+    Returns:
+        Datas de vencimento, na mesma ordem de start_dates
+    
+    Exemplo:
+        calculate_due_dates([date(2025, 12, 5), date(2025, 12, 6)], 1, True)
+        # [date(2025, 12, 8), date(2025, 12, 8)]
     """
-    # Buscar documentos obrigatórios para este tipo
-    required_docs = db.query(models.RequiredDocument).filter(
-        models.RequiredDocument.type_id == type_id
-    ).all()
+    if not business_days:
+        return [date.fromordinal(d.toordinal() + days) for d in start_dates]
+    if calendar is not None:
+        return calendar.offset_many(start_dates, days)
+    return weekday_offsets(start_dates, days)
+
+
+def parse_request_date(value: Optional[str], default: Optional[date] = None) -> Optional[date]:
+    """
+    Converte uma data da requisição (YYYY-MM-DD).
     
-    # Criar entrada no checklist para cada documento
-    for req_doc in required_docs:
-        proc_doc = models.ProcessDocument(
-            process_id=process_id,
-            document_id=req_doc.document_id,
-            required=req_doc.required,
-            provided=False  # Inicialmente não fornecido
+    Args:
+        value: Texto da data (None ou vazio retorna `default`)
+        default: Valor quando a data não foi informada
+    
+    Returns:
+        Data convertida
+    
+    Raises:
+        HTTPException 400: Data inválida
+    """
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Data inválida: {value}"
         )
-        db.add(proc_doc)
+
+
+def encode_cursor(created_date: date, process_id: int) -> str:
+    """
+    Gera o cursor opaco de paginação a partir do último processo da página.
     
-    db.commit()
+    Args:
+        created_date: Data da ordenação do último processo (criação ou próximo vencimento)
+        process_id: ID do último processo
+    
+    Returns:
+        Cursor em base64 url-safe
+    """
+    raw = f"{created_date.isoformat()}|{process_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
 
-def create_process_deadlines(db: Session, process_id: int, type_id: int, created_date: date):
+def decode_cursor(cursor: str) -> tuple:
     """
-    Cria prazos para um processo baseado nos prazos legais.
+    Decodifica um cursor gerado por encode_cursor.
+    
+    Args:
+        cursor: Cursor recebido do cliente
+    
+    Returns:
+        Tupla (created_date, id)
+    
+    Raises:
+        HTTPException 400: Cursor inválido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_str, id_str = raw.split("|")
+        return date.fromisoformat(created_str), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail=f"Cursor inválido: {cursor}")
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Verifica se o cabeçalho If-None-Match da requisição contém o ETag atual.
+    
+    Args:
+        request: Requisição HTTP
+        etag: ETag atual do recurso (com aspas)
+    
+    Returns:
+        True se o cliente já possui a versão atual
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparação fraca: ignora o prefixo W/
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def set_etag(response: Response, etag: str):
+    """
+    Define o ETag da resposta e obriga o navegador a revalidar a cada uso.
+    
+    Args:
+        response: Resposta HTTP
+        etag: ETag atual do recurso (com aspas)
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Resposta 304 Not Modified para um ETag ainda válido.
+    
+    Args:
+        etag: ETag atual do recurso (com aspas)
+    
+    Returns:
+        Resposta vazia com status 304
+    """
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def global_etag(db: Session, per_day: bool = False) -> str:
+    """
+    ETag forte derivado do contador global de versão dos dados.
+    
+    Args:
+        db: Sessão do banco
+        per_day: Se True, inclui a data de hoje (respostas que dependem de hoje,
+            como prazos vencidos, mudam na virada do dia mesmo sem escrita)
+    
+    Returns:
+        ETag com aspas (ex: "g42" ou "g42-2025-12-21")
+    """
+    return etag_for_version(models.get_data_version(db), per_day)
+
+
+def etag_for_version(version: int, per_day: bool = False) -> str:
+    """
+    Monta o ETag global a partir de uma versão já lida (ver global_etag).
+    
+    Args:
+        version: Versão global dos dados
+        per_day: Se True, inclui a data de hoje
+    
+    Returns:
+        ETag com aspas
+    """
+    if per_day:
+        return f'"g{version}-{date.today().isoformat()}"'
+    return f'"g{version}"'
+
+
+def process_etag(row) -> str:
+    """
+    ETag de detalhes de um processo a partir de (id, version).
+    
+    Args:
+        row: Linha de process_version_select()
+    
+    Returns:
+        ETag com aspas (ex: "p12-42")
+    """
+    return f'"p{row.id}-{row.version}"'
+
+
+def process_version_select(protocol: str):
+    """
+    SELECT do id e da versão de um processo, para o ETag de detalhes.
+    
+    Args:
+        protocol: Número do protocolo
+    
+    Returns:
+        Select de (id, version)
+    """
+    return select(models.Process.id, models.Process.version).where(
+        models.Process.protocol_number == protocol
+    )
+
+
+def iter_export(bind, stmt, export_format: str):
+    """
+    Gera o conteúdo da exportação em blocos, direto do cursor do banco.
+    
+    Abre uma conexão própria porque a sessão da requisição é fechada antes
+    de o corpo da StreamingResponse ser enviado. As linhas são lidas em lotes
+    de EXPORT_BATCH_SIZE (yield_per), então a memória fica constante.
+    
+    Args:
+        bind: Engine do banco
+        stmt: SELECT com as colunas de EXPORT_COLUMNS
+        export_format: 'csv' ou 'ndjson'
+    
+    Yields:
+        Blocos de texto prontos para envio
+    """
+    with bind.connect() as conn:
+        result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(stmt)
+        
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            yield buffer.getvalue()
+        
+        for rows in result.partitions():
+            buffer = io.StringIO()
+            if export_format == "csv":
+                writer = csv.writer(buffer)
+                for row in rows:
+                    writer.writerow(["" if value is None else str(value) for value in row])
+            else:
+                for row in rows:
+                    record = {
+                        column: str(value) if isinstance(value, date) else value
+                        for column, value in zip(EXPORT_COLUMNS, row)
+                    }
+                    buffer.write(json.dumps(record, ensure_ascii=False))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+
+def get_process_template(db: Session, type_id: int) -> dict:
+    """
+    Retorna o modelo (checklist, regras de prazo e calendário) de um tipo de processo.
+    
+    Os modelos de todos os tipos e o calendário de feriados são compilados de
+    uma vez (três consultas) e ficam em memória enquanto a versão de
+    referência não mudar. Os triggers de required_documents, legal_deadlines
+    e holidays incrementam essa versão em qualquer escrita, então cada sessão
+    (requisição ou importação) custa só uma leitura do contador.
     
     Args:
         db: Sessão do banco
-        process_id: ID do processo
         type_id: ID do tipo de processo
-        created_date: Data de criação do processo
+    
+    Returns:
+        Dict com "documents" [(document_id, required)], "deadlines"
+        [(legal_deadline_id, start_event, days_limit, is_business_days)] e
+        "calendar" (HolidayCalendar compartilhado por todos os tipos)
     """
-    # Buscar prazos legais aplicáveis (específicos do tipo ou gerais)
-    legal_deadlines = db.query(models.LegalDeadline).filter(
-        (models.LegalDeadline.type_id == type_id) | 
-        (models.LegalDeadline.type_id.is_(None))
-    ).all()
+    # A versão é conferida uma vez por sessão (requisição ou importação)
+    cached = db.info.get("process_templates")
+    if cached is not None:
+        return cached[1].get(type_id, cached[2])
+    
+    cache_key = str(db.get_bind().url)
+    version = models.get_data_version(db, models.REFERENCE_SCOPE)
+    cached = _template_cache.get(cache_key)
+    
+    if cached is None or cached[0] != version:
+        documents = db.execute(
+            select(models.RequiredDocument.type_id, models.RequiredDocument.document_id,
+                   models.RequiredDocument.required)
+            .order_by(models.RequiredDocument.doc_order, models.RequiredDocument.id)
+        ).all()
+        deadlines = db.execute(
+            select(models.LegalDeadline.type_id, models.LegalDeadline.id, models.LegalDeadline.start_event,
+                   models.LegalDeadline.days_limit, models.LegalDeadline.is_business_days)
+            .order_by(models.LegalDeadline.id)
+        ).all()
+        calendar = HolidayCalendar(db.execute(select(models.Holiday.holiday_date)).scalars())
+        
+        templates = {}
+        for doc_type_id, document_id, required in documents:
+            templates.setdefault(doc_type_id, {"documents": [], "deadlines": [], "calendar": calendar})
+            templates[doc_type_id]["documents"].append((document_id, required))
+        
+        # Prazos gerais (type_id NULL) valem para todos os tipos
+        general = [tuple(row[1:]) for row in deadlines if row.type_id is None]
+        for dl_type_id, *rule in deadlines:
+            if dl_type_id is not None:
+                templates.setdefault(dl_type_id, {"documents": [], "deadlines": [], "calendar": calendar})
+                templates[dl_type_id]["deadlines"].append(tuple(rule))
+        for template in templates.values():
+            template["deadlines"] = general + template["deadlines"]
+        
+        cached = (version, templates, {"documents": [], "deadlines": general, "calendar": calendar})
+        _template_cache[cache_key] = cached
     
-    for legal_dl in legal_deadlines:
-        # Por enquanto, suporta apenas start_event='created_date'
-        if legal_dl.start_event == 'created_date':
-            # Calcular data de vencimento
-            due = calculate_due_date(
-                created_date,
-                legal_dl.days_limit,
-                legal_dl.is_business_days
-            )
-            
-            # Criar prazo para o processo
-            proc_deadline = models.ProcessDeadline(
-                process_id=process_id,
-                legal_deadline_id=legal_dl.id,
-                due_date=due,
-                notified=False,
-                closed=False
-            )
-            db.add(proc_deadline)
+    db.info["process_templates"] = cached
+    return cached[1].get(type_id, cached[2])
+
+
+def get_holiday_calendar(db: Session) -> HolidayCalendar:
+    """
+    Retorna o calendário de feriados em memória (mesmo cache dos modelos).
     
-    db.commit()
+    Args:
+        db: Sessão do banco
+    
+    Returns:
+        HolidayCalendar com os feriados da tabela holidays
+    """
+    return get_process_template(db, None)["calendar"]
 
 
-# ============ Endpoints da API ============
+def checklist_rows(template: dict, process_id: int) -> list:
+    """
+    Expande o checklist de um modelo em linhas para INSERT em lote.
+    
+    Args:
+        template: Modelo retornado por get_process_template
+        process_id: ID do processo
+    
+    Returns:
+        Lista de dicts de process_documents
+    """
+    return [
+        {"process_id": process_id, "document_id": document_id,
+         "required": required, "provided": False}  # Inicialmente não fornecido
+        for document_id, required in template["documents"]
+    ]
 
-@app.get("/")
-def root():
+
+def creation_start_events(status_code: Optional[str] = None) -> tuple:
     """
-    Endpoint raiz - informações da API.
+    Eventos de início que já ocorrem no cadastro do processo.
+    
+    Args:
+        status_code: Status inicial do processo (opcional)
+    
+    Returns:
+        created_date e, se informado, o evento do status inicial
     """
-    return {
-        "message": "PGR API - Sistema de Processos Administrativos",
-        "version": "2.0.0",
-        "orm": "SQLAlchemy",
-        "docs": "/docs"
-    }
+    if status_code:
+        return (START_CREATED, START_STATUS_PREFIX + status_code)
+    return (START_CREATED,)
+
+
+def deadline_rows(template: dict, process_ids: List[int], start_dates: List[date],
+                  start_events: tuple = (START_CREATED,)) -> list:
+    """
+    Calcula os prazos de um modelo em linhas para INSERT em lote.
+    
+    Aceita vários processos do mesmo tipo: cada regra de prazo é aplicada a
+    todas as datas de início de uma vez (calculate_due_dates).
+    
+    Args:
+        template: Modelo retornado por get_process_template
+        process_ids: IDs dos processos
+        start_dates: Data de início da contagem de cada processo (mesma ordem)
+        start_events: Eventos de início das regras a aplicar (default: created_date)
+    
+    Returns:
+        Lista de dicts de process_deadlines
+    """
+    rows = []
+    for legal_deadline_id, start_event, days_limit, is_business_days in template["deadlines"]:
+        if start_event not in start_events:
+            continue
+        due_dates = calculate_due_dates(start_dates, days_limit, is_business_days, template["calendar"])
+        rows.extend(
+            {"process_id": process_id, "legal_deadline_id": legal_deadline_id,
+             "due_date": due, "start_date": start, "notified": False, "closed": False}
+            for process_id, start, due in zip(process_ids, start_dates, due_dates)
+        )
+    return rows
+
+
+def recompute_deadlines(db: Session) -> int:
+    """
+    Recalcula o vencimento de todos os prazos em aberto (ex.: após cadastrar feriados).
+    
+    Regras contadas do cadastro partem da data de criação atual do processo;
+    as dos demais eventos (document_complete, status:*) partem da data de
+    início gravada pelo motor de prazos (start_date). Prazos de eventos
+    gravados antes dessa coluna, sem start_date, ficam como estão.
+    
+    Carrega os prazos abertos com a data de início em uma única consulta,
+    recalcula cada regra em lote contra o calendário em memória e grava só
+    os que mudaram (UPDATE em lote por chave primária). Não faz commit.
+    
+    Args:
+        db: Sessão do banco
+    
+    Returns:
+        Quantidade de prazos cujo vencimento mudou
+    """
+    calendar = get_holiday_calendar(db)
+    rows = db.execute(
+        select(models.ProcessDeadline.id, models.ProcessDeadline.process_id, models.ProcessDeadline.due_date,
+               models.ProcessDeadline.start_date, models.Process.created_date, models.LegalDeadline.start_event,
+               models.LegalDeadline.id.label("legal_deadline_id"), models.LegalDeadline.days_limit,
+               models.LegalDeadline.is_business_days)
+        .join(models.Process, models.Process.id == models.ProcessDeadline.process_id)
+        .join(models.LegalDeadline, models.LegalDeadline.id == models.ProcessDeadline.legal_deadline_id)
+        .where(models.open_deadline(),
+               (models.LegalDeadline.start_event == START_CREATED) | models.ProcessDeadline.start_date.is_not(None))
+    ).all()
+    
+    # Agrupar por regra para calcular cada uma em lote
+    by_rule = {}
+    for row in rows:
+        by_rule.setdefault((row.legal_deadline_id, row.days_limit, row.is_business_days), []).append(row)
+    
+    changes = []
+    process_ids = set()
+    for (_, days_limit, is_business_days), rule_rows in by_rule.items():
+        start_dates = [row.created_date if row.start_event == START_CREATED else row.start_date
+                       for row in rule_rows]
+        due_dates = calculate_due_dates(start_dates, days_limit, is_business_days, calendar)
+        for row, start, due in zip(rule_rows, start_dates, due_dates):
+            if row.due_date != due or row.start_date != start:
+                changes.append({"id": row.id, "due_date": due, "start_date": start})
+                process_ids.add(row.process_id)
+    
+    if changes:
+        db.execute(update(models.ProcessDeadline), changes)
+        # Invalida os ETags das listagens e dos processos afetados
+        version = models.bump_data_version(db)
+        db.execute(
+            update(models.Process).where(models.Process.id.in_(process_ids)).values(version=version),
+            execution_options={"synchronize_session": False}
+        )
+    return len(changes)
+
+
+def create_process_checklist(db: Session, process: models.Process, type_id: int):
+    """
+    Cria checklist de documentos para um processo baseado no tipo.
+    
+    Expande o modelo do tipo em memória e grava tudo em um único INSERT em
+    lote, sem commit: quem chama decide quando confirmar. Ver add_process.
+    
+    Args:
+        db: Sessão do banco
+        process: Processo já com ID (após flush)
+        type_id: ID do tipo de processo
+    """
+    rows = checklist_rows(get_process_template(db, type_id), process.id)
+    if rows:
+        db.execute(insert(models.ProcessDocument), rows)
+
+
+def create_process_deadlines(db: Session, process: models.Process, type_id: int, created_date: date,
+                             status_code: Optional[str] = None):
+    """
+    Cria prazos para um processo baseado nos prazos legais.
+    
+    Calcula os prazos do modelo do tipo em memória e grava tudo em um único
+    INSERT em lote, sem commit: quem chama decide quando confirmar. Ver
+    add_process.
+    
+    Gera as regras que começam no cadastro (created_date e o status inicial);
+    as demais são criadas pelo motor de prazos quando o evento acontecer.
+    
+    Args:
+        db: Sessão do banco
+        process: Processo já com ID (após flush)
+        type_id: ID do tipo de processo
+        created_date: Data de criação do processo
+        status_code: Status inicial (opcional)
+    """
+    rows = deadline_rows(get_process_template(db, type_id), [process.id], [created_date],
+                         creation_start_events(status_code))
+    if rows:
+        db.execute(insert(models.ProcessDeadline), rows)
+
+
+def add_process(db: Session, process: models.Process, type_id: int, created_date: Optional[date],
+                status_code: Optional[str] = None) -> models.Process:
+    """
+    Adiciona à sessão um processo novo com checklist e prazos (unidade de trabalho).
+    
+    Faz um único flush (para obter o ID do processo) e dois INSERTs em lote,
+    mas não faz commit: tudo é confirmado no próximo commit de quem chama.
+    Assim um processo nunca fica gravado pela metade e o cadastro custa um
+    commit (um fsync) em vez de três. Usado por POST /processes, pelo
+    cadastro em lote e pelo importador de Excel.
+    
+    Args:
+        db: Sessão do banco
+        process: Processo novo (ainda não adicionado à sessão)
+        type_id: ID do tipo de processo
+        created_date: Data de criação (None: não gera prazos)
+        status_code: Status inicial (gera os prazos que começam nele)
+    
+    Returns:
+        O próprio processo, já com ID
+    """
+    db.add(process)
+    db.flush()
+    create_process_checklist(db, process, type_id)
+    if created_date:
+        create_process_deadlines(db, process, type_id, created_date, status_code)
+    return process
+
+
+def delete_processes(db: Session, criterion) -> List[str]:
+    """
+    Exclui os processos que atendem ao critério, com checklist e prazos.
+    
+    Exclusão em conjunto: um DELETE em processes com RETURNING dos
+    protocolos; checklist e prazos saem pelo ON DELETE CASCADE, já sem o
+    pai, então os triggers de resumo não recalculam nada por linha filha.
+    Nada é carregado na sessão e o custo não cresce em queries com o número
+    de processos. Em bancos criados antes do CASCADE as filhas são excluídas
+    antes, com um DELETE por tabela filtrado por subquery nos IDs dos
+    processos. Não faz commit.
+    
+    Args:
+        db: Sessão do banco
+        criterion: Condição sobre models.Process (ex: protocol_number.like(...))
+    
+    Returns:
+        Protocolos excluídos
+    """
+    process_ids = select(models.Process.id).where(criterion)
+    connection = db.connection()
+    for child in (models.ProcessDocument, models.ProcessDeadline):
+        if models.has_delete_cascade(connection, child.__tablename__):
+            continue
+        db.execute(
+            delete(child).where(child.process_id.in_(process_ids)),
+            execution_options={"synchronize_session": False}
+        )
+    return list(db.scalars(
+        delete(models.Process).where(criterion).returning(models.Process.protocol_number),
+        execution_options={"synchronize_session": False}
+    ))
+
+
+# ============ Arquivo Morto ============
+# Processos encerrados há mais de um limite saem das tabelas quentes para o
+# banco de arquivo (models.ARCHIVE_DB_PATH). GET /processes/{protocol} ainda
+# os encontra por lá; listagens, prazos e estatísticas passam a ignorá-los.
+
+def archivable_processes(cutoff: date):
+    """
+    Condição dos processos que podem ir para o arquivo morto.
+    
+    Encerrados (closed_date preenchida ou status final) cuja data de
+    encerramento (ou de criação, sem closed_date) é anterior a `cutoff`.
+    
+    Args:
+        cutoff: Data limite
+    
+    Returns:
+        Condição sobre models.Process
+    """
+    terminal_status_ids = select(models.Status.id).where(models.Status.code.in_(models.TERMINAL_STATUSES))
+    return (
+        (models.Process.closed_date.is_not(None) | models.Process.status_id.in_(terminal_status_ids))
+        & (func.coalesce(models.Process.closed_date, models.Process.created_date) < cutoff)
+    )
+
+
+def archive_closed_processes(db: Session, cutoff: date, chunk_size: int = ARCHIVE_CHUNK_SIZE,
+                             archive_path: Optional[str] = None) -> int:
+    """
+    Move processos encerrados antes de `cutoff` (com checklist e prazos) para o arquivo morto.
+    
+    Trabalha em blocos de `chunk_size` processos, cada um em sua própria
+    transação: INSERT ... SELECT de cada tabela para o banco anexado e
+    exclusão em conjunto no principal (delete_processes). Um bloco copiado
+    nunca fica pela metade, e o banco principal não fica travado pelo job
+    inteiro. processes usa AUTOINCREMENT, então um ID arquivado não volta a
+    ser dado a um processo novo no principal.
+    
+    Args:
+        db: Sessão do banco principal
+        cutoff: Arquiva o que foi encerrado antes desta data
+        chunk_size: Processos por transação
+        archive_path: Arquivo do banco de arquivo (default: models.ARCHIVE_DB_PATH)
+    
+    Returns:
+        Quantidade de processos arquivados
+    """
+    archived = 0
+    while True:
+        # ATTACH precisa vir antes da primeira escrita da transação
+        models.attach_archive(db.connection(), archive_path, create=True)
+        models.create_archive_tables(db.connection())
+        
+        ids = db.scalars(
+            select(models.Process.id)
+            .where(archivable_processes(cutoff))
+            .order_by(models.Process.id)
+            .limit(chunk_size)
+        ).all()
+        if not ids:
+            db.commit()
+            return archived
+        
+        for name, target in models.ARCHIVE_TABLES.items():
+            source = models.Base.metadata.tables[name]
+            key = source.c.id if name == "processes" else source.c.process_id
+            columns = [col.name for col in target.columns]
+            db.execute(insert(target).from_select(
+                columns, select(*[source.c[col] for col in columns]).where(key.in_(ids))
+            ))
+        delete_processes(db, models.Process.id.in_(ids))
+        models.bump_data_version(db)
+        db.commit()
+        archived += len(ids)
+
+
+def archived_process_details(db: Session, protocol: str) -> Optional[dict]:
+    """
+    Detalhes de um processo do arquivo morto, no formato de build_process_details.
+    
+    Três consultas (processo, checklist e prazos) juntando as tabelas do
+    arquivo com as de referência do banco principal.
+    
+    Args:
+        db: Sessão do banco principal
+        protocol: Número do protocolo
+    
+    Returns:
+        Detalhes com "archived": True, ou None se não houver arquivo ou processo
+    """
+    if not models.attach_archive(db.connection()):
+        return None
+    processes = models.ARCHIVE_TABLES["processes"]
+    documents = models.ARCHIVE_TABLES["process_documents"]
+    deadlines = models.ARCHIVE_TABLES["process_deadlines"]
+    
+    try:
+        process = db.execute(
+            select(processes,
+                   models.ProcessType.code.label("type_code"), models.ProcessType.name.label("type_name"),
+                   models.Status.code.label("status_code"), models.Status.label.label("status_label"))
+            .join(models.ProcessType, models.ProcessType.id == processes.c.type_id)
+            .join(models.Status, models.Status.id == processes.c.status_id)
+            .where(processes.c.protocol_number == protocol)
+            .order_by(processes.c.id.desc())
+        ).first()
+    except OperationalError:
+        return None  # Arquivo ainda sem tabelas
+    if not process:
+        return None
+    
+    document_rows = db.execute(
+        select(models.Document.code, models.Document.name, documents.c.required, documents.c.provided,
+               documents.c.provided_date, documents.c.observations)
+        .join(models.Document, models.Document.id == documents.c.document_id)
+        .where(documents.c.process_id == process.id)
+        .order_by(documents.c.id)
+    ).all()
+    deadline_rows = db.execute(
+        select(models.LegalDeadline.name, deadlines.c.due_date, models.LegalDeadline.days_limit,
+               deadlines.c.notified, deadlines.c.closed, deadlines.c.notes)
+        .join(models.LegalDeadline, models.LegalDeadline.id == deadlines.c.legal_deadline_id)
+        .where(deadlines.c.process_id == process.id)
+        .order_by(deadlines.c.id)
+    ).all()
+    
+    return {
+        "id": process.id,
+        "protocol_number": process.protocol_number,
+        "version": process.version,
+        "archived": True,
+        "type": {"code": process.type_code, "name": process.type_name},
+        "applicant_name": process.applicant_name,
+        "applicant_registration": process.applicant_registration,
+        "created_date": str(process.created_date),
+        "status": {"code": process.status_code, "label": process.status_label},
+        "parecer": process.parecer,
+        "financial_effective_date": str(process.financial_effective_date) if process.financial_effective_date else None,
+        "closed_date": str(process.closed_date) if process.closed_date else None,
+        "notes": process.notes,
+        "required_docs_total": process.required_docs_total,
+        "required_docs_provided": process.required_docs_provided,
+        "next_due_date": str(process.next_due_date) if process.next_due_date else None,
+        "open_deadlines": process.open_deadlines,
+        "documents": [
+            {
+                "code": doc.code,
+                "name": doc.name,
+                "required": doc.required,
+                "provided": doc.provided,
+                "provided_date": str(doc.provided_date) if doc.provided_date else None,
+                "observations": doc.observations
+            }
+            for doc in document_rows
+        ],
+        "deadlines": [
+            {
+                "name": dl.name,
+                "due_date": str(dl.due_date),
+                "days_limit": dl.days_limit,
+                "notified": dl.notified,
+                "closed": dl.closed,
+                "notes": dl.notes
+            }
+            for dl in deadline_rows
+        ]
+    }
+
+
+# ============ Motor de Prazos (eventos do processo) ============
+# Prazos cujo start_event não é created_date nascem de eventos do processo.
+# Os caminhos de escrita chamam o handler do evento dentro da mesma
+# transação; o handler mexe só nos prazos daquele processo, nunca varre a
+# tabela inteira.
+
+def materialize_deadlines(db: Session, processes: list, start_event: str, start_date: date) -> Set[int]:
+    """
+    Cria ou recalcula os prazos que começam em `start_event` para processos.
+    
+    Prazos ainda inexistentes são criados; os abertos têm o vencimento
+    recalculado se a data de início mudou; os fechados não são alterados.
+    Uma consulta lê os prazos existentes de todos os processos e as escritas
+    saem em lote (INSERT executemany e UPDATE por chave primária), então o
+    custo em queries não depende de quantos processos mudaram juntos.
+    Não faz commit.
+    
+    Args:
+        db: Sessão do banco
+        processes: Processos (objetos ou linhas com id e type_id)
+        start_event: Evento de início (document_complete, status:<CODE>)
+        start_date: Data em que o evento ocorreu (a mesma para todos)
+    
+    Returns:
+        IDs dos processos com algum prazo criado ou alterado
+    """
+    # Vencimento de cada regra do evento, por tipo de processo
+    due_by_type = {}
+    for process in processes:
+        if process.type_id not in due_by_type:
+            template = get_process_template(db, process.type_id)
+            due_by_type[process.type_id] = {
+                legal_deadline_id: calculate_due_date(start_date, days_limit, is_business_days,
+                                                      template["calendar"])
+                for legal_deadline_id, rule_event, days_limit, is_business_days in template["deadlines"]
+                if rule_event == start_event
+            }
+    targets = [process for process in processes if due_by_type[process.type_id]]
+    if not targets:
+        return set()
+    
+    rule_ids = {legal_deadline_id for dues in due_by_type.values() for legal_deadline_id in dues}
+    existing = {
+        (row.process_id, row.legal_deadline_id): row
+        for row in db.execute(
+            select(models.ProcessDeadline.id, models.ProcessDeadline.process_id,
+                   models.ProcessDeadline.legal_deadline_id, models.ProcessDeadline.due_date,
+                   models.ProcessDeadline.start_date, models.ProcessDeadline.closed)
+            .where(models.ProcessDeadline.process_id.in_([process.id for process in targets]),
+                   models.ProcessDeadline.legal_deadline_id.in_(rule_ids))
+        )
+    }
+    
+    inserts, updates, changed = [], [], set()
+    for process in targets:
+        for legal_deadline_id, due in due_by_type[process.type_id].items():
+            deadline = existing.get((process.id, legal_deadline_id))
+            if deadline is None:
+                inserts.append({"process_id": process.id, "legal_deadline_id": legal_deadline_id,
+                                "due_date": due, "start_date": start_date, "notified": False, "closed": False})
+            elif not deadline.closed and deadline.due_date != due:
+                # Novo vencimento: notificar de novo
+                updates.append({"id": deadline.id, "due_date": due, "start_date": start_date, "notified": False})
+            elif not deadline.closed and deadline.start_date != start_date:
+                # Mesmo vencimento, nova data de início (base de recompute_deadlines)
+                updates.append({"id": deadline.id, "start_date": start_date})
+            else:
+                continue
+            changed.add(process.id)
+    
+    if inserts:
+        db.execute(insert(models.ProcessDeadline), inserts)
+    if updates:
+        db.execute(update(models.ProcessDeadline), updates)
+    return changed
+
+
+def clear_deadlines(db: Session, process: models.Process, start_event: str) -> bool:
+    """
+    Remove os prazos abertos de um processo que começam em `start_event`.
+    
+    Usado quando o evento deixa de valer (ex.: um documento entregue é
+    desmarcado e a documentação volta a ficar incompleta). Não faz commit.
+    
+    Args:
+        db: Sessão do banco
+        process: Processo (com ID)
+        start_event: Evento de início
+    
+    Returns:
+        True se algum prazo foi removido
+    """
+    template = get_process_template(db, process.type_id)
+    rule_ids = [rule[0] for rule in template["deadlines"] if rule[1] == start_event]
+    if not rule_ids:
+        return False
+    
+    result = db.execute(
+        delete(models.ProcessDeadline).where(
+            models.ProcessDeadline.process_id == process.id,
+            models.ProcessDeadline.legal_deadline_id.in_(rule_ids),
+            models.open_deadline()
+        ),
+        execution_options={"synchronize_session": False}
+    )
+    return result.rowcount > 0
+
+
+def on_documents_changed(db: Session, process: models.Process) -> bool:
+    """
+    Evento: checklist do processo alterado.
+    
+    Com todos os documentos obrigatórios entregues, os prazos
+    document_complete contam a partir da última entrega; se a documentação
+    voltou a ficar incompleta, os prazos abertos desse evento são removidos.
+    
+    Args:
+        db: Sessão do banco (com as alterações do checklist já em flush)
+        process: Processo alterado
+    
+    Returns:
+        True se algum prazo foi criado, alterado ou removido
+    """
+    missing, last_provided = db.execute(
+        select(
+            func.count().filter(models.ProcessDocument.provided.is_(False)),
+            func.max(models.ProcessDocument.provided_date)
+        ).where(
+            models.ProcessDocument.process_id == process.id,
+            models.ProcessDocument.required.is_(True)
+        )
+    ).one()
+    
+    if missing:
+        return clear_deadlines(db, process, START_DOCUMENT_COMPLETE)
+    return bool(materialize_deadlines(db, [process], START_DOCUMENT_COMPLETE, last_provided or date.today()))
+
+
+def on_status_changed(db: Session, processes: list, status_code: str, changed_on: date) -> Set[int]:
+    """
+    Evento: processos mudaram para o status `status_code`.
+    
+    Cria (ou recalcula) os prazos com start_event = status:<novo status>.
+    
+    Args:
+        db: Sessão do banco
+        processes: Processos alterados (objetos ou linhas com id e type_id)
+        status_code: Código do novo status
+        changed_on: Data da mudança
+    
+    Returns:
+        IDs dos processos com algum prazo criado ou alterado
+    """
+    return materialize_deadlines(db, processes, START_STATUS_PREFIX + status_code, changed_on)
+
+
+def transition_status(db: Session, rows: list, status_code: str, status_id: int, version: int,
+                      status_date: date, expected_versions: Optional[dict] = None) -> Set[int]:
+    """
+    Muda o status de processos com um único UPDATE e aciona o motor de prazos.
+    
+    Processos que já estavam no status só recebem a nova versão; os demais
+    ganham os prazos status:<CODE> (on_status_changed). Não faz commit.
+    
+    Args:
+        db: Sessão do banco
+        rows: Linhas dos processos (id, type_id, status_id)
+        status_code: Código do novo status
+        status_id: ID do novo status
+        version: Nova versão global (bump_data_version)
+        status_date: Data da mudança
+        expected_versions: ID -> versão lida pelo cliente; se informado, só
+            muda os processos que ainda estão nessa versão
+    
+    Returns:
+        IDs dos processos alterados
+    """
+    if expected_versions is None:
+        criterion = models.Process.id.in_([row.id for row in rows])
+    else:
+        criterion = tuple_(models.Process.id, models.Process.version).in_(list(expected_versions.items()))
+    updated_ids = set(db.scalars(
+        update(models.Process)
+        .where(criterion)
+        .values(status_id=status_id, version=version)
+        .returning(models.Process.id),
+        execution_options={"synchronize_session": False}
+    ))
+    moved = [row for row in rows if row.id in updated_ids and row.status_id != status_id]
+    on_status_changed(db, moved, status_code, status_date)
+    return updated_ids
+
+
+def process_summary_select():
+    """
+    SELECT (Core) com as colunas de ProcessResponseSchema e joins explícitos.
+    
+    Usado pelas listagens: retorna linhas simples em vez de objetos ORM, sem
+    custo de hidratação nem de identity map por linha.
+    
+    Returns:
+        Select sobre processes + process_types + statuses
+    """
+    return select(
+        models.Process.id,
+        models.Process.protocol_number,
+        models.ProcessType.code.label("type_code"),
+        models.Process.applicant_name,
+        models.Process.created_date,
+        models.Status.code.label("status_code"),
+        models.Process.financial_effective_date,
+        models.Process.required_docs_total,
+        models.Process.required_docs_provided,
+        models.Process.next_due_date,
+        models.Process.open_deadlines
+    ).join(
+        models.ProcessType, models.Process.type_id == models.ProcessType.id
+    ).join(
+        models.Status, models.Process.status_id == models.Status.id
+    )
+
+
+def process_page_select(type_code: Optional[str], status_code: Optional[str],
+                        limit: int, cursor: Optional[str], overdue: bool = False,
+                        docs_pending: bool = False, sort: str = "created"):
+    """
+    SELECT de uma página de GET /processes (keyset em created_date DESC, id DESC).
+    
+    Busca limit + 1 linhas para que process_page saiba se há próxima página.
+    Filtros e ordenação por prazo usam as colunas de resumo de processes
+    (sem join com checklist ou prazos).
+    
+    Args:
+        type_code: Código do tipo para filtrar (opcional)
+        status_code: Código do status para filtrar (opcional)
+        limit: Tamanho da página
+        cursor: Cursor da página anterior (opcional)
+        overdue: Só processos com prazo em aberto vencido
+        docs_pending: Só processos com documento obrigatório não apresentado
+        sort: "created" (mais recentes primeiro) ou "next_due" (próximo
+            vencimento, só processos com prazo em aberto)
+    
+    Returns:
+        Select pronto para execução
+    
+    Raises:
+        HTTPException 400: Cursor inválido
+    """
+    # Projeção de colunas com joins explícitos (sem objetos ORM)
+    stmt = process_summary_select()
+    
+    # Aplicar filtros se fornecidos
+    if type_code:
+        stmt = stmt.where(models.ProcessType.code == type_code)
+    
+    if status_code:
+        stmt = stmt.where(models.Status.code == status_code)
+    
+    if overdue:
+        stmt = stmt.where(models.Process.next_due_date < date.today())
+    
+    if docs_pending:
+        stmt = stmt.where(models.Process.required_docs_provided < models.Process.required_docs_total)
+    
+    if sort == "next_due":
+        # Próximo vencimento primeiro (índice parcial idx_process_next_due)
+        stmt = stmt.where(models.Process.next_due_date.is_not(None))
+        if cursor:
+            last_due, last_id = decode_cursor(cursor)
+            stmt = stmt.where(tuple_(models.Process.next_due_date, models.Process.id) > (last_due, last_id))
+        return stmt.order_by(models.Process.next_due_date, models.Process.id).limit(limit + 1)
+    
+    # Continuar após o último processo da página anterior
+    if cursor:
+        last_created, last_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(models.Process.created_date, models.Process.id) < (last_created, last_id)
+        )
+    
+    # Ordenar por data de criação (mais recentes primeiro), id como desempate
+    stmt = stmt.order_by(models.Process.created_date.desc(), models.Process.id.desc())
+    
+    # Uma linha a mais para saber se existe próxima página
+    return stmt.limit(limit + 1)
+
+
+def process_page(rows, limit: int, sort: str = "created") -> dict:
+    """
+    Monta a resposta de GET /processes a partir das linhas de process_page_select.
+    
+    Args:
+        rows: Linhas retornadas (até limit + 1)
+        limit: Tamanho da página
+        sort: Ordenação usada no select ("created" ou "next_due")
+    
+    Returns:
+        Dicionário no formato de ProcessPageSchema
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.next_due_date if sort == "next_due" else last.created_date, last.id)
+    
+    return {"items": [process_summary(row) for row in rows], "next_cursor": next_cursor}
+
+
+def process_summary(row) -> dict:
+    """
+    Converte uma linha de process_summary_select() para o formato de resposta.
+    
+    Args:
+        row: Linha com as colunas de process_summary_select()
+    
+    Returns:
+        Dicionário no formato de ProcessResponseSchema
+    """
+    return {
+        "id": row.id,
+        "protocol_number": row.protocol_number,
+        "type_code": row.type_code,
+        "applicant_name": row.applicant_name,
+        "created_date": str(row.created_date),
+        "status_code": row.status_code,
+        "financial_effective_date": str(row.financial_effective_date) if row.financial_effective_date else None,
+        "required_docs_total": row.required_docs_total,
+        "required_docs_provided": row.required_docs_provided,
+        "next_due_date": str(row.next_due_date) if row.next_due_date else None,
+        "open_deadlines": row.open_deadlines
+    }
+
+
+def deadline_summary_select():
+    """
+    SELECT (Core) das colunas usadas nas listagens de prazos.
+    
+    Returns:
+        Select sobre process_deadlines + processes + process_types + legal_deadlines
+    """
+    return select(
+        models.Process.protocol_number,
+        models.ProcessType.name.label("type_name"),
+        models.LegalDeadline.name.label("deadline_name"),
+        models.ProcessDeadline.due_date,
+        models.ProcessDeadline.notified
+    ).select_from(
+        models.ProcessDeadline
+    ).join(
+        models.Process, models.ProcessDeadline.process_id == models.Process.id
+    ).join(
+        models.ProcessType, models.Process.type_id == models.ProcessType.id
+    ).join(
+        models.LegalDeadline, models.ProcessDeadline.legal_deadline_id == models.LegalDeadline.id
+    )
+
+
+def overdue_deadlines_select(today: date):
+    """
+    SELECT dos prazos vencidos (não fechados, due_date < hoje), mais antigos primeiro.
+    
+    Args:
+        today: Data de referência
+    
+    Returns:
+        Select pronto para execução
+    """
+    return deadline_summary_select().where(
+        models.open_deadline(),  # Apenas não fechados (índice parcial)
+        models.ProcessDeadline.due_date < today  # Vencidos
+    ).order_by(
+        models.ProcessDeadline.due_date.asc()  # Mais antigos primeiro
+    )
+
+
+def overdue_deadline(row, today: date) -> dict:
+    """
+    Converte uma linha de overdue_deadlines_select() no formato de DeadlineResponseSchema.
+    """
+    return {
+        "protocol_number": row.protocol_number,
+        "type_name": row.type_name,
+        "deadline_name": row.deadline_name,
+        "due_date": str(row.due_date),
+        "days_overdue": (today - row.due_date).days,
+        "notified": row.notified
+    }
+
+
+def upcoming_deadlines_select(today: date, end_date: date):
+    """
+    SELECT dos prazos abertos que vencem entre hoje e end_date.
+    
+    Args:
+        today: Data inicial
+        end_date: Data final (inclusive)
+    
+    Returns:
+        Select pronto para execução
+    """
+    return deadline_summary_select().where(
+        models.open_deadline(),
+        models.ProcessDeadline.due_date >= today,
+        models.ProcessDeadline.due_date <= end_date
+    ).order_by(
+        models.ProcessDeadline.due_date.asc()
+    )
+
+
+def upcoming_deadline(row, today: date) -> dict:
+    """
+    Converte uma linha de upcoming_deadlines_select() no formato de resposta.
+    """
+    return {
+        "protocol_number": row.protocol_number,
+        "type_name": row.type_name,
+        "deadline_name": row.deadline_name,
+        "due_date": str(row.due_date),
+        "days_remaining": (row.due_date - today).days,
+        "notified": row.notified
+    }
+
+
+def statistics_selects(today: date):
+    """
+    As duas consultas agregadas de GET /statistics/summary.
+    
+    Args:
+        today: Data de referência para prazos vencidos
+    
+    Returns:
+        Tupla (contagem de processos por status/tipo/mês, contagem de prazos vencidos)
+    """
+    # Contar processos por status, tipo e mês em uma única query.
+    # Partindo de statuses (LEFT JOIN) os status sem processos aparecem com 0.
+    month = func.strftime("%Y-%m", models.Process.created_date)
+    processes_stmt = select(
+        models.Status.code,
+        models.ProcessType.code,
+        month,
+        func.count(models.Process.id)
+    ).select_from(
+        models.Status
+    ).outerjoin(
+        models.Process, models.Process.status_id == models.Status.id
+    ).outerjoin(
+        models.ProcessType, models.Process.type_id == models.ProcessType.id
+    ).group_by(
+        models.Status.id, models.Process.type_id, month
+    )
+    
+    # Contar prazos vencidos
+    overdue_stmt = select(func.count(models.ProcessDeadline.id)).where(
+        models.open_deadline(),
+        models.ProcessDeadline.due_date < today
+    )
+    
+    return processes_stmt, overdue_stmt
+
+
+def statistics_summary(rows, overdue_count: int) -> dict:
+    """
+    Monta o resumo de estatísticas a partir das consultas de statistics_selects.
+    
+    Args:
+        rows: Linhas (status, tipo, mês, quantidade) do agregado de processos
+        overdue_count: Quantidade de prazos vencidos
+    
+    Returns:
+        Resumo com contadores por status, tipo e mês de criação
+    """
+    total_processes = 0
+    by_status = {}
+    by_type = {}
+    by_month = {}
+    for status_code, type_code, created_month, count in rows:
+        by_status[status_code] = by_status.get(status_code, 0) + count
+        if not count:
+            continue
+        total_processes += count
+        by_type[type_code] = by_type.get(type_code, 0) + count
+        by_month[created_month] = by_month.get(created_month, 0) + count
+    
+    return {
+        "total_processes": total_processes,
+        "by_status": by_status,
+        "by_type": by_type,
+        "by_month": dict(sorted(by_month.items())),
+        "overdue_deadlines": overdue_count,
+        "generated_at": str(date.today())
+    }
+
+
+def process_details_options():
+    """
+    Estratégias de carregamento para montar os detalhes de processos.
+    
+    Tipo e status vêm no mesmo SELECT (joined); checklist e prazos são
+    carregados com um SELECT ... IN cada (selectin). O total de queries fica
+    constante, independente da quantidade de processos.
+    
+    Returns:
+        Lista de opções para query.options()
+    """
+    return [
+        joinedload(models.Process.process_type),
+        joinedload(models.Process.status),
+        selectinload(models.Process.documents).joinedload(models.ProcessDocument.document),
+        selectinload(models.Process.deadlines).joinedload(models.ProcessDeadline.legal_deadline),
+    ]
+
+
+def process_details_select():
+    """
+    SELECT de processos com as estratégias de process_details_options().
+    
+    Returns:
+        Select de Process pronto para filtros/ordenação
+    """
+    return select(models.Process).options(*process_details_options())
+
+
+def build_process_details(process: models.Process) -> dict:
+    """
+    Monta o dicionário de detalhes completos de um processo.
+    
+    Args:
+        process: Processo com relacionamentos carregados
+    
+    Returns:
+        Detalhes do processo incluindo checklist e prazos
+    """
+    return {
+        "id": process.id,
+        "protocol_number": process.protocol_number,
+        "version": process.version,
+        "archived": False,
+        "type": {
+            "code": process.process_type.code,
+            "name": process.process_type.name
+        },
+        "applicant_name": process.applicant_name,
+        "applicant_registration": process.applicant_registration,
+        "created_date": str(process.created_date),
+        "status": {
+            "code": process.status.code,
+            "label": process.status.label
+        },
+        "parecer": process.parecer,
+        "financial_effective_date": str(process.financial_effective_date) if process.financial_effective_date else None,
+        "closed_date": str(process.closed_date) if process.closed_date else None,
+        "notes": process.notes,
+        "required_docs_total": process.required_docs_total,
+        "required_docs_provided": process.required_docs_provided,
+        "next_due_date": str(process.next_due_date) if process.next_due_date else None,
+        "open_deadlines": process.open_deadlines,
+        "documents": [
+            {
+                "code": doc.document.code,
+                "name": doc.document.name,
+                "required": doc.required,
+                "provided": doc.provided,
+                "provided_date": str(doc.provided_date) if doc.provided_date else None,
+                "observations": doc.observations
+            }
+            for doc in process.documents
+        ],
+        "deadlines": [
+            {
+                "name": dl.legal_deadline.name,
+                "due_date": str(dl.due_date),
+                "days_limit": dl.legal_deadline.days_limit,
+                "notified": dl.notified,
+                "closed": dl.closed,
+                "notes": dl.notes
+            }
+            for dl in process.deadlines
+        ]
+    }
+
+
+# ============ Endpoints da API ============
+
+@app.get("/")
+def root():
+    """
+    Endpoint raiz - informações da API.
+    """
+    return {
+        "message": "PGR API - Sistema de Processos Administrativos",
+        "version": "2.0.0",
+        "orm": "SQLAlchemy",
+        "docs": "/docs"
+    }
+
+
+@app.get("/health")
+def health_check(db: Session = Depends(get_db)):
+    """
+    Verifica se a API e o banco de dados estão funcionando.
+    """
+    try:
+        # Tenta fazer uma query simples
+        db.query(models.ProcessType).first()
+        return {"status": "healthy", "database": "connected"}
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database error: {str(e)}")
+
+
+@app.post("/processes", status_code=201, response_model=ProcessResponseSchema)
+def create_process(payload: ProcessCreateSchema, db: Session = Depends(get_db)):
+    """
+    Cadastra um novo processo administrativo.
+    
+    Fluxo:
+    1. Valida tipo de processo e status
+    2. Cria registro do processo
+    3. Gera checklist de documentos automaticamente
+    4. Calcula e cria prazos legais
+    5. Grava tudo em um único commit (add_process)
+    
+    Args:
+        payload: Dados do processo a ser criado
+        db: Sessão do banco (injetada)
+    
+    Returns:
+        Dados do processo criado
+    
+    Raises:
+        HTTPException 400: Dados inválidos
+        HTTPException 409: Protocolo já existe
+    """
+    # 1. Validar tipo de processo
+    process_type = db.query(models.ProcessType).filter(
+        models.ProcessType.code == payload.type_code
+    ).first()
+    
+    if not process_type:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo de processo inválido: {payload.type_code}"
+        )
+    
+    # 2. Validar status
+    status = db.query(models.Status).filter(
+        models.Status.code == payload.status_code
+    ).first()
+    
+    if not status:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Status inválido: {payload.status_code}"
+        )
+    
+    # 3. Verificar se protocolo já existe
+    existing = db.query(models.Process).filter(
+        models.Process.protocol_number == payload.protocol_number
+    ).first()
+    
+    if existing:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Protocolo já existe: {payload.protocol_number}"
+        )
+    
+    # 4. Definir data de criação (hoje se não informada)
+    created_date = parse_request_date(payload.created_date, date.today())
+    
+    # 5. Criar o processo (com a nova versão global dos dados)
+    version = models.bump_data_version(db)
+    new_process = models.Process(
+        protocol_number=payload.protocol_number,
+        type_id=process_type.id,
+        applicant_name=payload.applicant_name,
+        applicant_registration=payload.applicant_registration,
+        created_date=created_date,
+        status_id=status.id,
+        notes=payload.notes,
+        version=version
+    )
+    
+    # 6. Processo + checklist + prazos legais em uma única transação
+    add_process(db, new_process, process_type.id, created_date, status.code)
+    db.commit()
+    
+    # 7. Avisar os dashboards conectados (GET /events)
+    if events.broker.has_subscribers:
+        events.broker.publish("process-created", build_process_details(new_process), version)
+    
+    # 8. Retornar resposta
+    return ProcessResponseSchema(
+        id=new_process.id,
+        protocol_number=new_process.protocol_number,
+        type_code=process_type.code,
+        applicant_name=new_process.applicant_name,
+        created_date=str(new_process.created_date),
+        status_code=status.code,
+        financial_effective_date=str(new_process.financial_effective_date) if new_process.financial_effective_date else None,
+        required_docs_total=new_process.required_docs_total,
+        required_docs_provided=new_process.required_docs_provided,
+        next_due_date=str(new_process.next_due_date) if new_process.next_due_date else None,
+        open_deadlines=new_process.open_deadlines
+    )
+
+
+@app.post("/processes/batch", response_model=ProcessBatchResultSchema)
+def create_processes_batch(payload: ProcessBatchCreateSchema, db: Session = Depends(get_db)):
+    """
+    Cadastra vários processos de uma vez (usado pela página de upload).
+
+    POST /processes grava um processo por requisição (uma unidade de trabalho
+    e um commit cada). O lote amortiza esse custo pelas linhas:
+    1. Carrega os mapas de tipos e status (código -> id) uma única vez
+    2. Busca os protocolos já existentes em uma única consulta IN
+    3. Insere processos, checklists e prazos em lote (executemany)
+    4. Faz um único commit para o lote inteiro
+
+    Linhas inválidas ou com protocolo existente não interrompem o lote: cada
+    linha recebe seu próprio resultado (created, exists ou error).
+
+    Args:
+        payload: Lista de processos (até BATCH_MAX_SIZE)
+        db: Sessão do banco (injetada)
+
+    Returns:
+        Contadores e resultado de cada linha, na ordem recebida
+    """
+    items = payload.processes
+    results = []
+
+    # 1. Mapas de referência em memória
+    type_ids = dict(db.execute(select(models.ProcessType.code, models.ProcessType.id)).all())
+    status_ids = dict(db.execute(select(models.Status.code, models.Status.id)).all())
+
+    # 2. Protocolos já cadastrados (uma consulta para o lote inteiro)
+    protocols = {item.protocol_number for item in items}
+    existing = set(db.execute(
+        select(models.Process.protocol_number).where(models.Process.protocol_number.in_(protocols))
+    ).scalars()) if protocols else set()
+
+    # 3. Validar cada linha
+    version = None
+    rows = []
+    valid = []
+    seen = set()
+    for index, item in enumerate(items):
+        result = ProcessBatchItemSchema(index=index, protocol_number=item.protocol_number, result="error")
+        results.append(result)
+
+        if item.protocol_number in existing:
+            result.result = "exists"
+            continue
+        if item.protocol_number in seen:
+            result.error = "Protocolo repetido no lote"
+            continue
+        if item.type_code not in type_ids:
+            result.error = f"Tipo de processo inválido: {item.type_code}"
+            continue
+        if item.status_code not in status_ids:
+            result.error = f"Status inválido: {item.status_code}"
+            continue
+        try:
+            created_date = date.fromisoformat(item.created_date) if item.created_date else date.today()
+        except ValueError:
+            result.error = f"Data inválida: {item.created_date}"
+            continue
+
+        seen.add(item.protocol_number)
+        if version is None:
+            version = models.bump_data_version(db)
+        rows.append({
+            "protocol_number": item.protocol_number,
+            "type_id": type_ids[item.type_code],
+            "applicant_name": item.applicant_name,
+            "applicant_registration": item.applicant_registration,
+            "created_date": created_date,
+            "status_id": status_ids[item.status_code],
+            "notes": item.notes,
+            "version": version,
+        })
+        valid.append(result)
+
+    if rows:
+        # 4. Inserir processos em lote (protocolo -> ID gerado)
+        inserted = dict(db.execute(
+            insert(models.Process).returning(models.Process.protocol_number, models.Process.id),
+            rows
+        ).all())
+        ids = [inserted[row["protocol_number"]] for row in rows]
+
+        # 5. Checklists e prazos de todos os processos (modelos em memória)
+        documents = []
+        deadlines = []
+        by_type = {}
+        for process_id, row in zip(ids, rows):
+            template = get_process_template(db, row["type_id"])
+            documents.extend(checklist_rows(template, process_id))
+            by_type.setdefault((row["type_id"], row["status_id"]), []).append((process_id, row["created_date"]))
+        
+        # Prazos calculados em lote por tipo e status inicial (uma chamada por regra)
+        status_codes = {status_id: code for code, status_id in status_ids.items()}
+        for (type_id, status_id), processes in by_type.items():
+            process_ids, created_dates = zip(*processes)
+            deadlines.extend(deadline_rows(get_process_template(db, type_id), process_ids, created_dates,
+                                           creation_start_events(status_codes[status_id])))
+        if documents:
+            db.execute(insert(models.ProcessDocument), documents)
+        if deadlines:
+            db.execute(insert(models.ProcessDeadline), deadlines)
+
+        # 6. Um único commit para o lote
+        db.commit()
+
+        for result, process_id in zip(valid, ids):
+            result.result = "created"
+            result.id = process_id
+
+        # 7. Dashboards conectados recarregam a lista uma vez (em vez de um
+        # evento por processo)
+        if events.broker.has_subscribers:
+            events.broker.publish("resync", {}, version)
+
+    return ProcessBatchResultSchema(
+        created=len(rows),
+        skipped=sum(1 for r in results if r.result == "exists"),
+        errors=sum(1 for r in results if r.result == "error"),
+        results=results
+    )
+
+
+@app.get("/processes", response_model=ProcessPageSchema)
+def list_processes(
+    request: Request,
+    response: Response,
+    type_code: Optional[str] = Query(None, description="Filtrar por tipo de processo"),
+    status_code: Optional[str] = Query(None, description="Filtrar por status"),
+    limit: int = Query(100, ge=1, le=1000, description="Quantidade máxima de processos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (next_cursor)"),
+    overdue: bool = Query(False, description="Só processos com prazo vencido"),
+    docs_pending: bool = Query(False, description="Só processos com documento obrigatório pendente"),
+    sort: str = Query("created", pattern="^(created|next_due)$", description="created ou next_due"),
+    db: Session = Depends(get_db)
+):
+    """
+    Lista processos com filtros opcionais, paginados por cursor.
+    
+    A paginação é por keyset em (created_date DESC, id DESC): cada página
+    continua a partir do último processo da anterior usando o índice de
+    created_date, então páginas profundas custam o mesmo que a primeira.
+    Com sort=next_due, o keyset é (next_due_date, id) e a lista traz só
+    processos com prazo em aberto.
+    
+    Args:
+        type_code: Código do tipo para filtrar (opcional)
+        status_code: Código do status para filtrar (opcional)
+        limit: Tamanho da página (default: 100)
+        cursor: Valor de next_cursor da página anterior (opcional)
+        overdue: Só processos com prazo em aberto vencido
+        docs_pending: Só processos com documento obrigatório não apresentado
+        sort: Ordenação ("created" ou "next_due")
+        db: Sessão do banco (injetada)
+    
+    Returns:
+        Página de processos e cursor da próxima página (None na última)
+    
+    Raises:
+        HTTPException 400: Cursor inválido
+    """
+    # Responder 304 se nada mudou desde a última consulta do cliente
+    # (vencidos mudam com a data, então o ETag desse filtro vale por dia)
+    etag = global_etag(db, per_day=overdue)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    rows = db.execute(process_page_select(type_code, status_code, limit, cursor,
+                                          overdue, docs_pending, sort)).all()
+    return process_page(rows, limit, sort)
+
+
+@app.get("/processes/export")
+def export_processes(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$",
+                               description="Formato: csv ou ndjson"),
+    type_code: Optional[str] = Query(None, description="Filtrar por tipo de processo"),
+    status_code: Optional[str] = Query(None, description="Filtrar por status"),
+    db: Session = Depends(get_db)
+):
+    """
+    Exporta processos em CSV ou NDJSON (um JSON por linha) via streaming.
+    
+    As linhas saem direto de um cursor do banco, sem montar a lista inteira
+    em memória: o primeiro byte é enviado logo e o uso de memória não cresce
+    com a quantidade de processos.
+    
+    Args:
+        export_format: 'csv' (default) ou 'ndjson'
+        type_code: Código do tipo para filtrar (opcional)
+        status_code: Código do status para filtrar (opcional)
+        db: Sessão do banco (injetada)
+    
+    Returns:
+        StreamingResponse com o arquivo exportado
+    """
+    stmt = select(
+        models.Process.protocol_number,
+        models.ProcessType.code,
+        models.Process.applicant_name,
+        models.Process.applicant_registration,
+        models.Process.created_date,
+        models.Status.code,
+        models.Process.parecer,
+        models.Process.financial_effective_date,
+        models.Process.closed_date,
+        models.Process.notes
+    ).join(
+        models.ProcessType, models.Process.type_id == models.ProcessType.id
+    ).join(
+        models.Status, models.Process.status_id == models.Status.id
+    )
+    
+    if type_code:
+        stmt = stmt.where(models.ProcessType.code == type_code)
+    
+    if status_code:
+        stmt = stmt.where(models.Status.code == status_code)
+    
+    stmt = stmt.order_by(models.Process.created_date.desc(), models.Process.id.desc())
+    
+    media_type = "text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_export(db.get_bind(), stmt, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="processos.{export_format}"'}
+    )
+
+
+@app.get("/processes/search", response_model=List[ProcessResponseSchema])
+def search_processes(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, description="Texto de busca (protocolo, nome, matrícula, parecer, notas)"),
+    limit: int = Query(50, ge=1, le=500, description="Quantidade máxima de resultados"),
+    db: Session = Depends(get_db)
+):
+    """
+    Busca textual em processos usando o índice FTS5 (processes_fts).
+    
+    Procura em protocolo, nome do requerente, matrícula, parecer e notas.
+    Cada palavra é buscada por prefixo e sem acentos; os resultados vêm
+    ordenados por relevância (bm25).
+    
+    Args:
+        q: Texto de busca (ex: "joao 2025")
+        limit: Quantidade máxima de resultados (default: 50)
+        db: Sessão do banco (injetada)
+    
+    Returns:
+        Lista de processos, do mais relevante para o menos relevante
+    """
+    etag = global_etag(db)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    match = models.build_search_query(q)
+    if not match:
+        return []
+    
+    rows = db.execute(SEARCH_SQL, {"match": match, "limit": limit}).all()
+    
+    return [process_summary(row) for row in rows]
 
 
-@app.get("/health")
-def health_check(db: Session = Depends(get_db)):
+@app.get("/processes/dashboard")
+def get_dashboard(request: Request, response: Response, db: Session = Depends(get_db)):
     """
-    Verifica se a API e o banco de dados estão funcionando.
+    Retorna todos os processos com checklist e prazos em uma única resposta.
+
+    Substitui o padrão do dashboard de chamar GET /processes e depois
+    GET /processes/{protocol} para cada linha. Os relacionamentos são
+    carregados em um número constante de queries.
+
+    Args:
+        db: Sessão do banco (injetada)
+
+    Returns:
+        Lista de processos no mesmo formato de GET /processes/{protocol}
     """
-    try:
-        # Tenta fazer uma query simples
-        db.query(models.ProcessType).first()
-        return {"status": "healthy", "database": "connected"}
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Database error: {str(e)}")
+    etag = global_etag(db)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    processes = db.execute(
+        process_details_select().order_by(models.Process.created_date.desc())
+    ).scalars().all()
 
+    return [build_process_details(proc) for proc in processes]
 
-@app.post("/processes", status_code=201, response_model=ProcessResponseSchema)
-def create_process(payload: ProcessCreateSchema, db: Session = Depends(get_db)):
+
+@app.get("/processes/{protocol}")
+def get_process_details(
+    protocol: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """
-    Cadastra um novo processo administrativo.
-    
-    Fluxo:
-    1. Valida tipo de processo e status
-    2. Cria registro do processo
-    3. Gera checklist de documentos automaticamente
-    4. Calcula e cria prazos legais
+    Busca detalhes completos de um processo incluindo checklist e prazos.
     
     Args:
-        payload: Dados do processo a ser criado
+        protocol: Número do protocolo
         db: Sessão do banco (injetada)
     
     Returns:
-        Dados do processo criado
+        Detalhes completos do processo
     
     Raises:
-        HTTPException 400: Dados inválidos
-        HTTPException 409: Protocolo já existe
+        HTTPException 404: Processo não encontrado
     """
-    # 1. Validar tipo de processo
-    process_type = db.query(models.ProcessType).filter(
-        models.ProcessType.code == payload.type_code
-    ).first()
+    # Conferir a versão do processo antes de carregar qualquer objeto ORM
+    current = db.execute(process_version_select(protocol)).first()
+    if current:
+        etag = process_etag(current)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+    
+    # Buscar processo com relacionamentos (número fixo de queries)
+    process = db.execute(
+        process_details_select().where(models.Process.protocol_number == protocol)
+    ).scalars().first()
     
-    if not process_type:
+    if not process:
+        # Processo arquivado: buscar no arquivo morto
+        archived = archived_process_details(db, protocol)
+        if archived:
+            return archived
         raise HTTPException(
-            status_code=400,
-            detail=f"Tipo de processo inválido: {payload.type_code}"
+            status_code=404,
+            detail=f"Processo não encontrado: {protocol}"
         )
     
-    # 2. Validar status
-    status = db.query(models.Status).filter(
-        models.Status.code == payload.status_code
+    return build_process_details(process)
+
+
+@app.post("/processes/{protocol}/documents/{document_code}/provide")
+def provide_document(
+    protocol: str,
+    document_code: str,
+    payload: DocumentProvideSchema,
+    db: Session = Depends(get_db)
+):
+    """
+    Marca um documento do checklist como entregue (ou desfaz a entrega).
+    
+    Quando o último documento obrigatório é entregue, o motor de prazos cria
+    os prazos com start_event='document_complete' contados da última entrega;
+    se a documentação volta a ficar incompleta, esses prazos são removidos.
+    
+    Args:
+        protocol: Número do protocolo
+        document_code: Código do documento (ex: CERT_CURSO)
+        payload: Entrega, data e observações
+        db: Sessão do banco (injetada)
+    
+    Returns:
+        Situação do checklist e dados atualizados do processo
+    
+    Raises:
+        HTTPException 400: Data inválida
+        HTTPException 404: Processo ou item do checklist não encontrado
+    """
+    process = db.query(models.Process).filter(
+        models.Process.protocol_number == protocol
     ).first()
     
-    if not status:
+    if not process:
         raise HTTPException(
-            status_code=400,
-            detail=f"Status inválido: {payload.status_code}"
+            status_code=404,
+            detail=f"Processo não encontrado: {protocol}"
         )
     
-    # 3. Verificar se protocolo já existe
-    existing = db.query(models.Process).filter(
-        models.Process.protocol_number == payload.protocol_number
-    ).first()
+    item = db.execute(
+        select(models.ProcessDocument).join(
+            models.Document, models.Document.id == models.ProcessDocument.document_id
+        ).where(
+            models.ProcessDocument.process_id == process.id,
+            models.Document.code == document_code
+        )
+    ).scalars().first()
     
-    if existing:
+    if not item:
         raise HTTPException(
-            status_code=409,
-            detail=f"Protocolo já existe: {payload.protocol_number}"
+            status_code=404,
+            detail=f"Documento {document_code} não está no checklist de {protocol}"
         )
     
-    # 4. Definir data de criação (hoje se não informada)
-    created_date = date.fromisoformat(payload.created_date) if payload.created_date else date.today()
+    provided_date = parse_request_date(payload.provided_date, date.today())
     
-    # 5. Criar o processo
-    new_process = models.Process(
-        protocol_number=payload.protocol_number,
-        type_id=process_type.id,
-        applicant_name=payload.applicant_name,
-        applicant_registration=payload.applicant_registration,
-        created_date=created_date,
-        status_id=status.id,
-        notes=payload.notes
-    )
+    # 1. Atualizar o item do checklist
+    item.provided = payload.provided
+    item.provided_date = provided_date if payload.provided else None
+    if payload.observations is not None:
+        item.observations = payload.observations
+    db.flush()
     
-    db.add(new_process)
-    db.commit()
-    db.refresh(new_process)  # Atualiza com o ID gerado
+    # 2. Motor de prazos: só os prazos deste processo
+    deadlines_changed = on_documents_changed(db, process)
     
-    # 6. Gerar checklist de documentos
-    create_process_checklist(db, new_process.id, process_type.id)
+    # 3. Nova versão dos dados e um único commit
+    process.version = models.bump_data_version(db)
+    db.commit()
     
-    # 7. Gerar prazos legais
-    create_process_deadlines(db, new_process.id, process_type.id, created_date)
+    details = build_process_details(process)
+    if events.broker.has_subscribers:
+        events.broker.publish("process-updated", details, process.version)
     
-    # 8. Retornar resposta
-    return ProcessResponseSchema(
-        id=new_process.id,
-        protocol_number=new_process.protocol_number,
-        type_code=process_type.code,
-        applicant_name=new_process.applicant_name,
-        created_date=str(new_process.created_date),
-        status_code=status.code,
-        financial_effective_date=str(new_process.financial_effective_date) if new_process.financial_effective_date else None
-    )
+    return {
+        "protocol_number": protocol,
+        "document_code": document_code,
+        "provided": item.provided,
+        "all_provided": all(doc["provided"] for doc in details["documents"] if doc["required"]),
+        "deadlines_changed": deadlines_changed,
+        "process": details
+    }
 
 
-@app.get("/processes", response_model=List[ProcessResponseSchema])
-def list_processes(
-    type_code: Optional[str] = Query(None, description="Filtrar por tipo de processo"),
-    status_code: Optional[str] = Query(None, description="Filtrar por status"),
-    db: Session = Depends(get_db)
-):
+@app.patch("/processes/{protocol}")
+def update_process(protocol: str, payload: ProcessUpdateSchema, db: Session = Depends(get_db)):
     """
-    Lista todos os processos com filtros opcionais.
+    Atualiza campos de um processo com controle de concorrência otimista.
+    
+    O UPDATE só é aplicado se a versão do processo ainda for a lida pelo
+    cliente (WHERE version = :version); se outra pessoa gravou antes, nada é
+    alterado e a resposta é 409 com a versão atual. Mudança de status aciona
+    o motor de prazos (prazos status:<CODE>).
     
     Args:
-        type_code: Código do tipo para filtrar (opcional)
-        status_code: Código do status para filtrar (opcional)
+        protocol: Número do protocolo
+        payload: Versão lida e campos a alterar
         db: Sessão do banco (injetada)
     
     Returns:
-        Lista de processos
-    """
-    # Query base com joins
-    query = db.query(models.Process).join(models.ProcessType).join(models.Status)
+        Detalhes atualizados do processo
     
-    # Aplicar filtros se fornecidos
-    if type_code:
-        query = query.filter(models.ProcessType.code == type_code)
+    Raises:
+        HTTPException 400: Status ou data inválidos
+        HTTPException 404: Processo não encontrado
+        HTTPException 409: Processo alterado depois da leitura
+    """
+    current = db.execute(
+        select(models.Process.id, models.Process.type_id, models.Process.status_id, models.Process.version)
+        .where(models.Process.protocol_number == protocol)
+    ).first()
     
-    if status_code:
-        query = query.filter(models.Status.code == status_code)
+    if not current:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Processo não encontrado: {protocol}"
+        )
     
-    # Ordenar por data de criação (mais recentes primeiro)
-    query = query.order_by(models.Process.created_date.desc())
+    # 1. Validar os campos enviados
+    values = payload.model_dump(exclude_unset=True, exclude={"version", "status_date", "status_code"})
+    for field in ("financial_effective_date", "closed_date"):
+        if field in values:
+            values[field] = parse_request_date(values[field])
+    status_date = parse_request_date(payload.status_date, date.today())
+    
+    status = None
+    if payload.status_code is not None:
+        status = db.execute(
+            select(models.Status.id, models.Status.code).where(models.Status.code == payload.status_code)
+        ).first()
+        if not status:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Status inválido: {payload.status_code}"
+            )
+        values["status_id"] = status.id
     
-    # Executar query
-    processes = query.all()
+    # 2. UPDATE condicionado à versão lida (sem carregar o processo no ORM)
+    conflict = HTTPException(
+        status_code=409,
+        detail=f"Processo {protocol} foi alterado por outra pessoa (versão atual: {current.version})"
+    )
+    if current.version != payload.version:
+        raise conflict
+    
+    version = models.bump_data_version(db)
+    updated = db.execute(
+        update(models.Process)
+        .where(models.Process.id == current.id, models.Process.version == payload.version)
+        .values(**values, version=version),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    if not updated:
+        db.rollback()
+        raise conflict
+    
+    # 3. Motor de prazos: só quando o status realmente mudou
+    if status and status.id != current.status_id:
+        on_status_changed(db, [current], status.code, status_date)
+    db.commit()
     
-    # Converter para schema de resposta
-    result = []
-    for proc in processes:
-        result.append(ProcessResponseSchema(
-            id=proc.id,
-            protocol_number=proc.protocol_number,
-            type_code=proc.process_type.code,
-            applicant_name=proc.applicant_name,
-            created_date=str(proc.created_date),
-            status_code=proc.status.code,
-            financial_effective_date=str(proc.financial_effective_date) if proc.financial_effective_date else None
-        ))
+    process = db.execute(
+        process_details_select().where(models.Process.id == current.id)
+    ).scalars().first()
+    details = build_process_details(process)
+    if events.broker.has_subscribers:
+        events.broker.publish("process-updated", details, version)
     
-    return result
+    return details
 
 
-@app.get("/processes/{protocol}")
-def get_process_details(protocol: str, db: Session = Depends(get_db)):
+@app.post("/processes/status-transitions", response_model=StatusTransitionResultSchema)
+def transition_process_statuses(payload: StatusTransitionBatchSchema, db: Session = Depends(get_db)):
     """
-    Busca detalhes completos de um processo incluindo checklist e prazos.
+    Muda o status de vários processos de uma vez (concorrência otimista).
+    
+    Cada item traz a versão lida pelo cliente. Os processos são agrupados
+    por status de destino e cada grupo vira um único
+    UPDATE ... WHERE (id, version) IN (...) RETURNING id, sem carregar
+    objetos ORM; quem mudou depois da leitura fica de fora como conflito.
+    Processos não encontrados, status inválidos e conflitos não interrompem o
+    lote. Tudo é confirmado em um único commit.
     
     Args:
-        protocol: Número do protocolo
+        payload: Lista de mudanças (até BATCH_MAX_SIZE) e data da mudança
         db: Sessão do banco (injetada)
     
     Returns:
-        Detalhes completos do processo
+        Totais e o resultado de cada processo
     
     Raises:
-        HTTPException 404: Processo não encontrado
+        HTTPException 400: Data inválida
     """
-    # Buscar processo com relacionamentos
-    process = db.query(models.Process).filter(
-        models.Process.protocol_number == protocol
-    ).first()
-    
-    if not process:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Processo não encontrado: {protocol}"
+    transitions = payload.transitions
+    status_date = parse_request_date(payload.status_date, date.today())
+    
+    # 1. Status e versões atuais em duas consultas
+    status_ids = dict(db.execute(select(models.Status.code, models.Status.id)).all())
+    current = {
+        row.protocol_number: row
+        for row in db.execute(
+            select(models.Process.id, models.Process.protocol_number, models.Process.type_id,
+                   models.Process.status_id, models.Process.version)
+            .where(models.Process.protocol_number.in_({t.protocol_number for t in transitions}))
         )
-    
-    # Montar resposta completa
-    return {
-        "id": process.id,
-        "protocol_number": process.protocol_number,
-        "type": {
-            "code": process.process_type.code,
-            "name": process.process_type.name
-        },
-        "applicant_name": process.applicant_name,
-        "applicant_registration": process.applicant_registration,
-        "created_date": str(process.created_date),
-        "status": {
-            "code": process.status.code,
-            "label": process.status.label
-        },
-        "parecer": process.parecer,
-        "financial_effective_date": str(process.financial_effective_date) if process.financial_effective_date else None,
-        "closed_date": str(process.closed_date) if process.closed_date else None,
-        "notes": process.notes,
-        "documents": [
-            {
-                "code": doc.document.code,
-                "name": doc.document.name,
-                "required": doc.required,
-                "provided": doc.provided,
-                "provided_date": str(doc.provided_date) if doc.provided_date else None,
-                "observations": doc.observations
-            }
-            for doc in process.documents
-        ],
-        "deadlines": [
-            {
-                "name": dl.legal_deadline.name,
-                "due_date": str(dl.due_date),
-                "days_limit": dl.legal_deadline.days_limit,
-                "notified": dl.notified,
-                "closed": dl.closed,
-                "notes": dl.notes
-            }
-            for dl in process.deadlines
-        ]
     }
+    
+    # 2. Validar cada item e agrupar por status de destino
+    results = []
+    groups = {}
+    seen = set()
+    for index, transition in enumerate(transitions):
+        result = StatusTransitionItemSchema(index=index, protocol_number=transition.protocol_number,
+                                            result="error")
+        results.append(result)
+        row = current.get(transition.protocol_number)
+        
+        if transition.protocol_number in seen:
+            result.error = "Protocolo repetido no lote"
+        elif row is None:
+            result.result = "not_found"
+        elif transition.status_code not in status_ids:
+            result.error = f"Status inválido: {transition.status_code}"
+        elif row.version != transition.version:
+            result.result = "conflict"
+            result.version = row.version
+        else:
+            groups.setdefault(transition.status_code, []).append((result, row, transition.version))
+        seen.add(transition.protocol_number)
+    
+    # 3. Um UPDATE por status de destino, condicionado às versões lidas
+    if groups:
+        version = models.bump_data_version(db)
+        for status_code, items in groups.items():
+            updated_ids = transition_status(
+                db, [row for _, row, _ in items], status_code, status_ids[status_code], version, status_date,
+                expected_versions={row.id: expected for _, row, expected in items}
+            )
+            for result, row, _ in items:
+                if row.id in updated_ids:
+                    result.result = "updated"
+                    result.version = version
+                else:
+                    result.result = "conflict"
+        db.commit()
+        
+        if events.broker.has_subscribers:
+            events.broker.publish("resync", {}, version)
+    
+    counts = {name: sum(1 for r in results if r.result == name) for name in ("updated", "conflict", "not_found")}
+    return StatusTransitionResultSchema(
+        updated=counts["updated"],
+        conflicts=counts["conflict"],
+        not_found=counts["not_found"],
+        errors=sum(1 for r in results if r.result == "error"),
+        results=results
+    )
 
 
 @app.delete("/processes/{protocol}")
@@ -464,19 +2450,20 @@ def delete_process(protocol: str, db: Session = Depends(get_db)):
     Raises:
         HTTPException 404: Processo não encontrado
     """
-    process = db.query(models.Process).filter(
-        models.Process.protocol_number == protocol
-    ).first()
+    deleted = delete_processes(db, models.Process.protocol_number == protocol)
     
-    if not process:
+    if not deleted:
         raise HTTPException(
             status_code=404,
             detail=f"Processo não encontrado: {protocol}"
         )
     
-    db.delete(process)
+    version = models.bump_data_version(db)
     db.commit()
     
+    if events.broker.has_subscribers:
+        events.broker.publish("process-deleted", {"protocols": [protocol]}, version)
+    
     return {
         "message": f"Processo {protocol} deletado com sucesso",
         "protocol": protocol
@@ -498,22 +2485,23 @@ def bulk_delete_processes(
     Returns:
         Estatísticas da operação
     """
-    deleted = 0
-    not_found = []
-    
-    for protocol in protocols:
-        process = db.query(models.Process).filter(
-            models.Process.protocol_number == protocol
-        ).first()
-        
-        if process:
-            db.delete(process)
-            deleted += 1
-        else:
-            not_found.append(protocol)
-    
+    # Um conjunto de DELETEs por bloco de protocolos (limite de parâmetros do SQLite)
+    unique_protocols = list(dict.fromkeys(protocols))
+    deleted_protocols = []
+    for start in range(0, len(unique_protocols), BATCH_MAX_SIZE):
+        chunk = unique_protocols[start:start + BATCH_MAX_SIZE]
+        deleted_protocols.extend(delete_processes(db, models.Process.protocol_number.in_(chunk)))
+    
+    deleted = len(deleted_protocols)
+    found = set(deleted_protocols)
+    not_found = [protocol for protocol in unique_protocols if protocol not in found]
+    
+    version = models.bump_data_version(db) if deleted else None
     db.commit()
     
+    if deleted and events.broker.has_subscribers:
+        events.broker.publish("process-deleted", {"protocols": deleted_protocols}, version)
+    
     return {
         "message": f"{deleted} processo(s) deletado(s)",
         "deleted": deleted,
@@ -542,28 +2530,21 @@ def bulk_delete_by_pattern(
         - PGR-2025-%: Deleta todos os processos de 2025
         - %TEST%: Deleta processos com TEST no protocolo
     """
-    # Buscar processos que correspondem ao padrão
-    processes = db.query(models.Process).filter(
-        models.Process.protocol_number.like(pattern)
-    ).all()
+    deleted_protocols = delete_processes(db, models.Process.protocol_number.like(pattern))
     
-    if not processes:
+    if not deleted_protocols:
         return {
             "message": "Nenhum processo encontrado com esse padrão",
             "deleted": 0,
             "pattern": pattern
         }
     
-    # Coletar protocolos antes de deletar
-    deleted_protocols = [p.protocol_number for p in processes]
-    
-    # Deletar todos
-    db.query(models.Process).filter(
-        models.Process.protocol_number.like(pattern)
-    ).delete(synchronize_session=False)
-    
+    version = models.bump_data_version(db)
     db.commit()
     
+    if events.broker.has_subscribers:
+        events.broker.publish("process-deleted", {"protocols": deleted_protocols}, version)
+    
     return {
         "message": f"{len(deleted_protocols)} processo(s) deletado(s)",
         "deleted": len(deleted_protocols),
@@ -572,8 +2553,74 @@ def bulk_delete_by_pattern(
     }
 
 
+@app.get("/events")
+async def stream_events(request: Request):
+    """
+    Feed de alterações em tempo real via Server-Sent Events.
+    
+    O dashboard conecta uma vez e recebe apenas os deltas (process-created,
+    process-updated, process-deleted) conforme as escritas são confirmadas,
+    em vez de recarregar tudo periodicamente.
+    
+    O primeiro evento é 'ready' com a versão atual dos dados. Se o cliente
+    reconectar (Last-Event-ID) e a versão tiver mudado nesse intervalo, o
+    primeiro evento é 'resync', indicando que ele deve recarregar a lista.
+    A cada keep-alive a versão do primário é conferida: se avançou sem
+    evento (escrita de script ou de outro worker), também vai um 'resync'.
+    A versão inicial também vem do primário (nunca de uma réplica atrasada),
+    para que as duas comparações usem a mesma fonte.
+    
+    Args:
+        request: Requisição HTTP (usada para detectar desconexão)
+    
+    Returns:
+        StreamingResponse com media type text/event-stream
+    """
+    # Assinar antes de ler a versão para não perder eventos nesse intervalo
+    queue = events.broker.subscribe()
+    try:
+        current_version = await run_in_threadpool(models.EngineRouter.version, engine_router.primary)
+    except Exception:
+        events.broker.unsubscribe(queue)
+        raise
+    last_event_id = request.headers.get("last-event-id")
+    
+    async def event_stream():
+        seen_version = current_version
+        try:
+            if last_event_id is not None and last_event_id != str(current_version):
+                yield events.format_sse("resync", {}, current_version)
+            else:
+                yield events.format_sse("ready", {"version": current_version}, current_version)
+            
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=events.KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Escritas fora deste processo não passam pelo broker
+                    latest = await run_in_threadpool(models.EngineRouter.version, engine_router.primary)
+                    if latest > seen_version:
+                        seen_version = latest
+                        yield events.format_sse("resync", {}, latest)
+                    else:
+                        yield ": keep-alive\n\n"  # Comentário SSE: mantém a conexão aberta
+                    continue
+                event_id = events.message_event_id(message)
+                if event_id is not None:
+                    seen_version = max(seen_version, event_id)
+                yield message
+        finally:
+            events.broker.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/deadlines/overdue", response_model=List[DeadlineResponseSchema])
-def list_overdue_deadlines(db: Session = Depends(get_db)):
+def list_overdue_deadlines(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Lista todos os prazos vencidos (não fechados).
     
@@ -587,41 +2634,23 @@ def list_overdue_deadlines(db: Session = Depends(get_db)):
     Returns:
         Lista de prazos vencidos com dias de atraso
     """
+    etag = global_etag(db, per_day=True)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
     today = date.today()
     
-    # Query com joins para pegar informações relacionadas
-    overdue = db.query(models.ProcessDeadline).join(
-        models.Process
-    ).join(
-        models.ProcessType
-    ).join(
-        models.LegalDeadline
-    ).filter(
-        models.ProcessDeadline.closed.is_(False),  # Apenas não fechados
-        models.ProcessDeadline.due_date < today  # Vencidos
-    ).order_by(
-        models.ProcessDeadline.due_date.asc()  # Mais antigos primeiro
-    ).all()
+    overdue = db.execute(overdue_deadlines_select(today)).all()
     
     # Montar resposta com cálculo de dias de atraso
-    result = []
-    for deadline in overdue:
-        days_overdue = (today - deadline.due_date).days
-        
-        result.append(DeadlineResponseSchema(
-            protocol_number=deadline.process.protocol_number,
-            type_name=deadline.process.process_type.name,
-            deadline_name=deadline.legal_deadline.name,
-            due_date=str(deadline.due_date),
-            days_overdue=days_overdue,
-            notified=deadline.notified
-        ))
-    
-    return result
+    return [overdue_deadline(row, today) for row in overdue]
 
 
 @app.get("/deadlines/upcoming")
 def list_upcoming_deadlines(
+    request: Request,
+    response: Response,
     days: int = Query(7, ge=1, le=90, description="Quantidade de dias à frente"),
     db: Session = Depends(get_db)
 ):
@@ -635,73 +2664,53 @@ def list_upcoming_deadlines(
     Returns:
         Lista de prazos próximos
     """
+    etag = global_etag(db, per_day=True)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
     today = date.today()
     end_date = today + timedelta(days=days)
     
     # Query prazos no intervalo
-    upcoming = db.query(models.ProcessDeadline).join(
-        models.Process
-    ).join(
-        models.ProcessType
-    ).join(
-        models.LegalDeadline
-    ).filter(
-        models.ProcessDeadline.closed.is_(False),
-        models.ProcessDeadline.due_date >= today,
-        models.ProcessDeadline.due_date <= end_date
-    ).order_by(
-        models.ProcessDeadline.due_date.asc()
-    ).all()
+    upcoming = db.execute(upcoming_deadlines_select(today, end_date)).all()
     
     # Montar resposta
-    result = []
-    for deadline in upcoming:
-        days_remaining = (deadline.due_date - today).days
-        
-        result.append({
-            "protocol_number": deadline.process.protocol_number,
-            "type_name": deadline.process.process_type.name,
-            "deadline_name": deadline.legal_deadline.name,
-            "due_date": str(deadline.due_date),
-            "days_remaining": days_remaining,
-            "notified": deadline.notified
-        })
-    
-    return result
+    return [upcoming_deadline(row, today) for row in upcoming]
 
 
 @app.get("/statistics/summary")
-def get_statistics(db: Session = Depends(get_db)):
+def get_statistics(request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Retorna estatísticas gerais do sistema.
     
+    Todos os contadores saem de duas consultas agregadas (uma em processes
+    agrupada por status, tipo e mês, outra em process_deadlines), então o
+    número de queries não cresce com a quantidade de status ou tipos.
+    
     Returns:
-        Resumo com contadores
+        Resumo com contadores por status, tipo e mês de criação
     """
-    total_processes = db.query(models.Process).count()
-    
-    # Contar por status
-    by_status = {}
-    statuses = db.query(models.Status).all()
-    for status in statuses:
-        count = db.query(models.Process).filter(
-            models.Process.status_id == status.id
-        ).count()
-        by_status[status.code] = count
+    etag = global_etag(db, per_day=True)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     
-    # Contar prazos vencidos
-    today = date.today()
-    overdue_count = db.query(models.ProcessDeadline).filter(
-        models.ProcessDeadline.closed.is_(False),
-        models.ProcessDeadline.due_date < today
-    ).count()
+    processes_stmt, overdue_stmt = statistics_selects(date.today())
+    rows = db.execute(processes_stmt).all()
+    overdue_count = db.execute(overdue_stmt).scalar()
     
-    return {
-        "total_processes": total_processes,
-        "by_status": by_status,
-        "overdue_deadlines": overdue_count,
-        "generated_at": str(date.today())
-    }
+    return statistics_summary(rows, overdue_count)
+
+
+# ============ Modo Assíncrono ============
+
+if ASYNC_DB:
+    try:
+        from . import api_async
+    except ImportError:
+        import api_async
+    api_async.install_async_routes(app)
 
 
 # ============ Script de Inicialização ============
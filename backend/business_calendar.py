@@ -0,0 +1,183 @@
+"""
+Calendário de dias úteis - Sistema PGR
+
+Aritmética de dias úteis (segunda a sexta, menos feriados) usada no cálculo
+dos prazos legais com is_business_days.
+
+Funcionamento:
+--------------
+- Fins de semana: fórmula fechada (semanas cheias + resto), sem laço dia a dia
+- Feriados: lista ordenada de ordinais carregada uma vez da tabela holidays;
+  quantos feriados caem em um intervalo sai de duas buscas binárias (bisect)
+- Lote: offset_many aplica o mesmo prazo a várias datas de início, no estilo
+  de numpy.busday_offset com um busdaycalendar
+
+Uso:
+----
+    calendar = HolidayCalendar([date(2025, 12, 25)])
+    calendar.add_business_days(date(2025, 12, 24), 1)  # date(2025, 12, 26)
+"""
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Iterable, List
+
+
+def add_business_days(start_date: date, days: int) -> date:
+    """
+    Adiciona dias úteis (segunda a sexta) a uma data em tempo constante.
+
+    Cada bloco de 5 dias úteis é uma semana cheia (7 dias corridos); o resto
+    (0 a 4 dias) só cruza um fim de semana se passar da sexta. Uma data de
+    sábado ou domingo conta como a sexta anterior (o primeiro dia útil
+    seguinte a ambos é a segunda).
+
+    Args:
+        start_date: Data inicial
+        days: Quantidade de dias úteis (<= 0 retorna a própria data)
+
+    Returns:
+        Data após `days` dias úteis
+    """
+    if days <= 0:
+        return start_date
+    return date.fromordinal(_weekday_offset(start_date.toordinal(), days))
+
+
+def _weekday_offset(ordinal: int, days: int) -> int:
+    """Fórmula fechada de add_business_days sobre ordinais (days > 0)."""
+    weekday = (ordinal - 1) % 7  # Mesmo valor de date.weekday(): 0=Segunda, 4=Sexta
+    friday_shift = max(weekday - 4, 0)  # Sábado/domingo voltam para a sexta
+    weeks, remainder = divmod(days, 5)
+    offset = weeks * 7 + remainder - friday_shift
+    if weekday - friday_shift + remainder >= 5:
+        offset += 2  # O resto atravessa um fim de semana
+    return ordinal + offset
+
+
+class HolidayCalendar:
+    """
+    Calendário de dias úteis com feriados, carregado uma vez em memória.
+
+    Guarda só os feriados que caem em dias de semana (os de fim de semana
+    não mudam nenhum prazo), como ordinais ordenados para busca binária.
+    """
+
+    def __init__(self, holidays: Iterable[date] = ()):
+        self.holidays = sorted({d.toordinal() for d in holidays if d.weekday() < 5})
+
+    def __len__(self) -> int:
+        return len(self.holidays)
+
+    def is_business_day(self, day: date) -> bool:
+        """Indica se a data é dia útil (dia de semana e não feriado)."""
+        ordinal = day.toordinal()
+        index = bisect_right(self.holidays, ordinal)
+        return day.weekday() < 5 and not (index and self.holidays[index - 1] == ordinal)
+
+    def add_business_days(self, start_date: date, days: int) -> date:
+        """
+        Adiciona dias úteis pulando fins de semana e feriados.
+
+        Parte da data só com fins de semana e, enquanto houver feriados no
+        intervalo que ainda não foram compensados, avança mais esse número de
+        dias úteis. Cada rodada custa duas buscas binárias; termina em poucas
+        rodadas (só cresce quando o trecho acrescentado contém feriados).
+
+        Args:
+            start_date: Data inicial
+            days: Quantidade de dias úteis (<= 0 retorna a própria data)
+
+        Returns:
+            Data após `days` dias úteis
+        """
+        if days <= 0:
+            return start_date
+        return date.fromordinal(self._offset(start_date.toordinal(), days))
+
+    def offset_many(self, start_dates: List[date], days: int) -> List[date]:
+        """
+        Aplica o mesmo prazo em dias úteis a várias datas de início.
+
+        Args:
+            start_dates: Datas iniciais
+            days: Quantidade de dias úteis
+
+        Returns:
+            Datas de vencimento, na mesma ordem de start_dates
+        """
+        if days <= 0:
+            return list(start_dates)
+        offset = self._offset
+        return [date.fromordinal(offset(start.toordinal(), days)) for start in start_dates]
+
+    def _offset(self, ordinal: int, days: int) -> int:
+        """add_business_days sobre ordinais (days > 0)."""
+        holidays = self.holidays
+        due = _weekday_offset(ordinal, days)
+        if not holidays:
+            return due
+        first = bisect_right(holidays, ordinal)  # Feriados depois da data inicial
+        counted = 0
+        while True:
+            pending = bisect_right(holidays, due) - first - counted
+            if pending <= 0:
+                return due
+            # Feriados no intervalo: avançar mais `pending` dias úteis
+            due = _weekday_offset(due, pending)
+            counted += pending
+
+
+def weekday_offsets(start_dates: List[date], days: int) -> List[date]:
+    """
+    Versão em lote de add_business_days (só fins de semana).
+
+    Args:
+        start_dates: Datas iniciais
+        days: Quantidade de dias úteis
+
+    Returns:
+        Datas de vencimento, na mesma ordem de start_dates
+    """
+    return HolidayCalendar().offset_many(start_dates, days)
+
+
+def brazilian_national_holidays(year: int) -> List[tuple]:
+    """
+    Feriados nacionais de um ano (fixos e a Sexta-feira da Paixão).
+
+    Args:
+        year: Ano
+
+    Returns:
+        Lista de (data, nome)
+    """
+    easter = _easter(year)
+    holidays = [
+        (date(year, 1, 1), "Confraternização Universal"),
+        (easter - timedelta(days=2), "Sexta-feira da Paixão"),
+        (date(year, 4, 21), "Tiradentes"),
+        (date(year, 5, 1), "Dia do Trabalho"),
+        (date(year, 9, 7), "Independência do Brasil"),
+        (date(year, 10, 12), "Nossa Senhora Aparecida"),
+        (date(year, 11, 2), "Finados"),
+        (date(year, 11, 15), "Proclamação da República"),
+        (date(year, 12, 25), "Natal"),
+    ]
+    if year >= 2024:
+        holidays.append((date(year, 11, 20), "Dia Nacional de Zumbi e da Consciência Negra"))
+    return sorted(holidays)
+
+
+def _easter(year: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
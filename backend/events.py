@@ -0,0 +1,140 @@
+"""
+Feed de eventos em tempo real (Server-Sent Events) - Sistema PGR
+
+Este módulo distribui os eventos de alteração de processos para os
+dashboards conectados em GET /events, substituindo o polling periódico.
+
+Funcionamento:
+--------------
+- Cada conexão SSE assina o broker e recebe uma fila asyncio própria
+- Os endpoints de escrita (síncronos, rodando no threadpool) publicam os
+  eventos depois do commit; o broker entrega em cada fila pelo event loop
+- O id de cada evento é a versão global dos dados (data_versions), então um
+  cliente que reconecta com Last-Event-ID sabe se perdeu alguma alteração
+
+Tipos de evento:
+- process-created: processo cadastrado (dados completos do processo)
+- process-updated: processo alterado (dados completos do processo)
+- process-deleted: processo(s) excluído(s) (protocolos)
+- resync: o cliente perdeu eventos e deve recarregar a lista completa
+
+O broker vive na memória do processo: escritas de scripts (importador,
+load_holidays, archive_processes) ou de outros workers não passam por ele.
+Por isso GET /events confere a versão dos dados a cada keep-alive e envia
+resync quando ela avançou sem evento correspondente.
+"""
+import asyncio
+import json
+import threading
+from typing import Optional
+
+# Tamanho máximo da fila de cada assinante antes de pedir resync
+MAX_QUEUE_SIZE = 1000
+
+# Intervalo (segundos) entre comentários de keep-alive na conexão SSE
+KEEPALIVE_SECONDS = 15
+
+
+def format_sse(event: str, data, event_id: Optional[int] = None) -> str:
+    """
+    Formata uma mensagem no protocolo Server-Sent Events.
+
+    Args:
+        event: Tipo do evento
+        data: Conteúdo (serializado como JSON)
+        event_id: Id do evento (versão dos dados), opcional
+
+    Returns:
+        Mensagem SSE terminada por linha em branco
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def message_event_id(message: str) -> Optional[int]:
+    """
+    Id (versão dos dados) de uma mensagem gerada por format_sse.
+
+    Args:
+        message: Mensagem SSE formatada
+
+    Returns:
+        Id do evento, ou None se a mensagem não tiver id
+    """
+    if not message.startswith("id: "):
+        return None
+    return int(message[4:message.index("\n")])
+
+
+class EventBroker:
+    """
+    Distribui eventos para todas as conexões SSE abertas.
+
+    subscribe/unsubscribe são chamados no event loop; publish pode ser chamado
+    de qualquer thread (os endpoints síncronos rodam no threadpool).
+    """
+
+    def __init__(self, max_queue_size: int = MAX_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}  # fila -> event loop dono da fila
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        """Indica se há alguém conectado (evita montar eventos à toa)."""
+        return bool(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Registra um novo assinante no event loop atual.
+
+        Returns:
+            Fila onde as mensagens SSE formatadas serão entregues
+        """
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove um assinante (conexão encerrada)."""
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, event: str, data, event_id: Optional[int] = None):
+        """
+        Envia um evento para todos os assinantes.
+
+        Args:
+            event: Tipo do evento
+            data: Conteúdo do evento (serializável em JSON)
+            event_id: Versão dos dados após a alteração
+        """
+        message = format_sse(event, data, event_id)
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, message)
+            except RuntimeError:
+                # Event loop já encerrado: descartar o assinante
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, message: str):
+        """Coloca a mensagem na fila; se o cliente está atrasado, pede resync."""
+        if queue.full():
+            # Descarta o que está pendente: o cliente vai recarregar tudo
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(format_sse("resync", {}))
+            return
+        queue.put_nowait(message)
+
+
+# Broker único da aplicação
+broker = EventBroker()
@@ -14,6 +14,9 @@ Estrutura do Banco:
 6. process_documents: Checklist de documentos por processo
 7. legal_deadlines: Prazos legais configurados
 8. process_deadlines: Prazos específicos de cada processo
+9. data_versions: Contadores de versão dos dados (ETags)
+10. processes_fts: Índice de busca textual (SQLite FTS5) sobre processes
+11. holidays: Feriados que não contam como dias úteis nos prazos
 
 Relacionamentos:
 ---------------
@@ -31,11 +34,23 @@ Versão: 2.0.0
 Data: Dezembro 2025
 """
 from sqlalchemy import (
-    Column, Integer, String, Text, Boolean, Date, ForeignKey, Index, create_engine
+    Column, Integer, String, Text, Boolean, Date, ForeignKey, Index, MetaData, Table, create_engine, event,
+    false, inspect, select, text
 )
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy.schema import CreateTable
+from contextvars import ContextVar
 from datetime import date
 from pathlib import Path
+from typing import Optional
+import itertools
+import os
+import time
+import warnings
 
 # Base para todos os modelos ORM
 Base = declarative_base()
@@ -118,16 +133,44 @@ class Process(Base):
     financial_effective_date = Column(Date, nullable=True)  # Data de efeito financeiro
     closed_date = Column(Date, nullable=True)  # Data de fechamento do processo
     notes = Column(Text, nullable=True)  # Observações gerais
+    version = Column(Integer, nullable=False, default=0, server_default=text('0'))  # Versão global da última alteração (ETag)
+    
+    # Resumo de checklist e prazos, mantido pelos triggers de PROCESS_SUMMARY_TRIGGERS
+    # (não gravar pela aplicação): listagens filtram e ordenam sem joins
+    required_docs_total = Column(Integer, nullable=False, default=0, server_default=text('0'))  # Documentos obrigatórios
+    required_docs_provided = Column(Integer, nullable=False, default=0, server_default=text('0'))  # Obrigatórios apresentados
+    next_due_date = Column(Date, nullable=True)  # Vencimento mais próximo entre os prazos em aberto
+    open_deadlines = Column(Integer, nullable=False, default=0, server_default=text('0'))  # Prazos em aberto
     
     # Relacionamentos
-    process_type = relationship("ProcessType", back_populates="processes")
-    status = relationship("Status", back_populates="processes")
-    documents = relationship("ProcessDocument", back_populates="process")
-    deadlines = relationship("ProcessDeadline", back_populates="process")
+    # Estratégias de carregamento explícitas para evitar N+1:
+    # - tipo e status (muitos para um) vêm no mesmo SELECT do processo (joined)
+    # - checklist e prazos vêm em um SELECT ... IN por coleção (selectin)
+    process_type = relationship("ProcessType", back_populates="processes", lazy="joined")
+    status = relationship("Status", back_populates="processes", lazy="joined")
+    # passive_deletes: filhos removidos pelo ON DELETE CASCADE do banco, sem SELECT antes
+    documents = relationship("ProcessDocument", back_populates="process", lazy="selectin",
+                             cascade="all, delete-orphan", passive_deletes=True)
+    deadlines = relationship("ProcessDeadline", back_populates="process", lazy="selectin",
+                             cascade="all, delete-orphan", passive_deletes=True)
     
     # Índices compostos
+    # idx_process_status_type_created cobre o agregado de GET /statistics/summary
+    # (status -> tipo, mês de criação) sem ler a tabela
+    # idx_process_type_created e idx_process_status_created entregam
+    # GET /processes?type_code=... ou ?status_code=... já na ordem da
+    # paginação (created_date DESC, id DESC), sem ordenar em B-tree temporária
+    # idx_process_next_due (parcial: só processos com prazo em aberto) atende
+    # GET /processes?sort=next_due e ?overdue=true
+    # AUTOINCREMENT: IDs de processos excluídos ou arquivados nunca voltam a
+    # ser usados (o arquivo morto guarda os processos pelo mesmo ID)
     __table_args__ = (
         Index('idx_process_type_status', 'type_id', 'status_id'),
+        Index('idx_process_status_type_created', 'status_id', 'type_id', 'created_date'),
+        Index('idx_process_type_created', 'type_id', 'created_date', 'id'),
+        Index('idx_process_status_created', 'status_id', 'created_date', 'id'),
+        Index('idx_process_next_due', 'next_due_date', sqlite_where=text('next_due_date IS NOT NULL')),
+        {'sqlite_autoincrement': True},
     )
 
 
@@ -162,7 +205,7 @@ class ProcessDocument(Base):
     __tablename__ = 'process_documents'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    process_id = Column(Integer, ForeignKey('processes.id'), nullable=False)  # FK para processo
+    process_id = Column(Integer, ForeignKey('processes.id', ondelete='CASCADE'), nullable=False)  # FK para processo
     document_id = Column(Integer, ForeignKey('documents.id'), nullable=False)  # FK para documento
     required = Column(Boolean, nullable=False, default=True)  # Se é obrigatório neste processo
     provided = Column(Boolean, nullable=False, default=False)  # Se foi apresentado
@@ -171,11 +214,13 @@ class ProcessDocument(Base):
     
     # Relacionamentos
     process = relationship("Process", back_populates="documents")
-    document = relationship("Document", back_populates="process_documents")
+    document = relationship("Document", back_populates="process_documents", lazy="joined")
     
     # Índices
+    # Um item de checklist por documento em cada processo; o prefixo process_id
+    # atende também as buscas pelo checklist de um processo
     __table_args__ = (
-        Index('idx_proc_doc_process', 'process_id'),
+        Index('uq_proc_doc_process_document', 'process_id', 'document_id', unique=True),
     )
 
 
@@ -207,27 +252,495 @@ class ProcessDeadline(Base):
     __tablename__ = 'process_deadlines'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    process_id = Column(Integer, ForeignKey('processes.id'), nullable=False)  # FK para processo
+    process_id = Column(Integer, ForeignKey('processes.id', ondelete='CASCADE'), nullable=False)  # FK para processo
     legal_deadline_id = Column(Integer, ForeignKey('legal_deadlines.id'), nullable=False)  # FK prazo legal
     due_date = Column(Date, nullable=False, index=True)  # Data de vencimento calculada
+    start_date = Column(Date, nullable=True)  # Início da contagem (data do start_event)
     notified = Column(Boolean, nullable=False, default=False)  # Se já foi notificado
     closed = Column(Boolean, nullable=False, default=False)  # Se o prazo foi cumprido/fechado
     notes = Column(Text, nullable=True)  # Observações sobre o prazo
     
     # Relacionamentos
     process = relationship("Process", back_populates="deadlines")
-    legal_deadline = relationship("LegalDeadline", back_populates="process_deadlines")
+    legal_deadline = relationship("LegalDeadline", back_populates="process_deadlines", lazy="joined")
     
     # Índices
+    # idx_deadline_open_due: índice parcial só com os prazos em aberto, em ordem
+    # de vencimento (vencidos, próximos, estatísticas). O SQLite só usa um índice
+    # parcial se a consulta repetir a condição dele: filtrar com open_deadline().
     __table_args__ = (
         Index('idx_deadline_process', 'process_id'),
-        Index('idx_deadline_due', 'due_date'),
+        Index('idx_deadline_open_due', 'closed', 'due_date', sqlite_where=text('closed = 0')),
+    )
+
+
+def open_deadline():
+    """
+    Condição "prazo em aberto" na forma do índice parcial idx_deadline_open_due.
+    
+    Gera `closed = 0`; a forma `closed IS 0` (de .is_(False)) não casa com o
+    índice e faz o SQLite percorrer também os prazos já fechados.
+    """
+    return ProcessDeadline.closed == false()
+
+
+class Holiday(Base):
+    """
+    Feriados nacionais e locais que não contam como dias úteis.
+    
+    Usados no cálculo dos prazos com LegalDeadline.is_business_days.
+    Carregados uma vez em memória (ver business_calendar.HolidayCalendar).
+    """
+    __tablename__ = 'holidays'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    holiday_date = Column(Date, unique=True, nullable=False, index=True)  # Data do feriado
+    name = Column(String(200), nullable=False)  # Ex: Tiradentes, Aniversário da cidade
+    scope = Column(String(20), nullable=False, default="NACIONAL")  # NACIONAL, ESTADUAL ou MUNICIPAL
+
+
+class DataVersion(Base):
+    """
+    Contadores de versão dos dados, usados para gerar ETags.
+    
+    O escopo 'global' é incrementado a cada escrita em processos (criação,
+    exclusão, importação). Cada processo guarda em Process.version o valor
+    global do momento da sua última alteração, então as versões nunca se
+    repetem, mesmo que um protocolo seja excluído e recriado.
+    
+    O escopo 'schema' guarda a versão do esquema já aplicada ao banco
+    (SCHEMA_VERSION), conferida na inicialização da API.
+    """
+    __tablename__ = 'data_versions'
+    
+    scope = Column(String(50), primary_key=True)  # Escopo do contador (global)
+    version = Column(Integer, nullable=False, default=0)  # Valor atual
+
+
+# ============ Busca Textual (FTS5) ============
+
+# Colunas de processes indexadas para busca
+SEARCH_COLUMNS = ["protocol_number", "applicant_name", "applicant_registration", "parecer", "notes"]
+
+_search_cols = ", ".join(SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{col}" for col in SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{col}" for col in SEARCH_COLUMNS)
+
+# Tabela virtual FTS5 com conteúdo externo (lê os textos de processes) e
+# triggers que mantêm o índice sincronizado com inserts, updates e deletes.
+# remove_diacritics faz "joao" encontrar "João".
+SEARCH_INDEX_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE processes_fts USING fts5(
+        {_search_cols},
+        content='processes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER processes_fts_ai AFTER INSERT ON processes BEGIN
+        INSERT INTO processes_fts(rowid, {_search_cols}) VALUES (new.id, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER processes_fts_ad AFTER DELETE ON processes BEGIN
+        INSERT INTO processes_fts(processes_fts, rowid, {_search_cols})
+        VALUES ('delete', old.id, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER processes_fts_au AFTER UPDATE OF {_search_cols} ON processes BEGIN
+        INSERT INTO processes_fts(processes_fts, rowid, {_search_cols})
+        VALUES ('delete', old.id, {_old_values});
+        INSERT INTO processes_fts(rowid, {_search_cols}) VALUES (new.id, {_new_values});
+    END
+    """,
+    # Indexar processos que já existiam antes da criação do índice
+    "INSERT INTO processes_fts(processes_fts) VALUES ('rebuild')",
+]
+
+
+def create_search_index(engine):
+    """
+    Cria o índice FTS5 de processos e seus triggers, se ainda não existirem.
+    
+    Args:
+        engine: Engine do SQLAlchemy
+    """
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'processes_fts'"
+        )).first()
+        if exists:
+            return
+        for ddl in SEARCH_INDEX_DDL:
+            conn.execute(text(ddl))
+
+
+def build_search_query(terms: str) -> str:
+    """
+    Converte o texto digitado pelo usuário em uma expressão FTS5 segura.
+    
+    Cada palavra vira uma frase entre aspas com busca por prefixo, então
+    caracteres especiais (hífens, aspas, parênteses) não geram erro de sintaxe.
+    
+    Args:
+        terms: Texto de busca (ex: "joao PGR-2025")
+    
+    Returns:
+        Expressão MATCH (ex: '"joao"* "PGR-2025"*'), ou "" se não houver termos
+    
+    Exemplo:
+        build_search_query("PGR-2025 silva")  # '"PGR-2025"* "silva"*'
+    """
+    tokens = terms.split()
+    return " ".join('"' + token.replace('"', '""') + '"*' for token in tokens)
+
+
+# ============ Versão dos Dados de Referência ============
+
+# Escopo de data_versions alterado sempre que mudam as tabelas usadas nos
+# modelos de checklist e prazos e no calendário de feriados
+# (ver api_sqlalchemy.get_process_template)
+REFERENCE_SCOPE = "reference"
+
+# Tabelas de referência que invalidam os modelos e o calendário em memória
+REFERENCE_TABLES = ["required_documents", "legal_deadlines", "holidays"]
+
+# Triggers que incrementam a versão de referência em qualquer escrita nessas
+# tabelas, inclusive feitas por scripts (seed) fora da API
+REFERENCE_VERSION_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {operation} ON {table} BEGIN
+        INSERT OR IGNORE INTO data_versions(scope, version) VALUES ('{REFERENCE_SCOPE}', 0);
+        UPDATE data_versions SET version = version + 1 WHERE scope = '{REFERENCE_SCOPE}';
+    END
+    """
+    for table in REFERENCE_TABLES
+    for suffix, operation in [("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")]
+]
+
+
+def create_reference_triggers(engine):
+    """
+    Cria os triggers de versão das tabelas de referência, se não existirem.
+    
+    Args:
+        engine: Engine do SQLAlchemy
+    """
+    with engine.begin() as conn:
+        for ddl in REFERENCE_VERSION_DDL:
+            conn.execute(text(ddl))
+
+
+# ============ Resumo por Processo ============
+
+# Recalcula as colunas de resumo de processes a partir dos filhos. O UPDATE
+# de cada trigger toca só o processo afetado e usa os índices por process_id.
+# Nos prazos o índice é fixado: dentro do trigger o planejador preferia
+# idx_deadline_open_due (closed = 0) e percorria todos os prazos em aberto.
+_DOCUMENTS_SUMMARY = """
+    (required_docs_total, required_docs_provided) = (
+        SELECT COUNT(*), COALESCE(SUM(provided = 1), 0) FROM process_documents
+        WHERE process_documents.process_id = processes.id AND required = 1
+    )
+"""
+_DEADLINES_SUMMARY = """
+    (open_deadlines, next_due_date) = (
+        SELECT COUNT(*), MIN(due_date) FROM process_deadlines INDEXED BY idx_deadline_process
+        WHERE process_deadlines.process_id = processes.id AND closed = 0
+    )
+"""
+
+# Triggers (nome -> DDL) que mantêm o resumo em qualquer escrita no checklist
+# ou nos prazos, inclusive INSERT/UPDATE em lote (Core) e scripts fora da API.
+# UPDATE/DELETE só recalculam se o processo ainda existe: na exclusão pelo
+# ON DELETE CASCADE o pai já saiu e o trigger não faz nada por linha filha.
+PROCESS_SUMMARY_TRIGGERS = {
+    f"{table}_summary_{suffix}": f"""
+    CREATE TRIGGER {table}_summary_{suffix} AFTER {operation} ON {table}
+    {guard} BEGIN
+        UPDATE processes SET {summary} WHERE id IN ({targets});
+    END
+    """
+    for table, summary, columns in [
+        ("process_documents", _DOCUMENTS_SUMMARY, "process_id, required, provided"),
+        ("process_deadlines", _DEADLINES_SUMMARY, "process_id, due_date, closed"),
+    ]
+    for suffix, operation, targets in [
+        ("ai", "INSERT", "new.process_id"),
+        ("au", f"UPDATE OF {columns}", "old.process_id, new.process_id"),
+        ("ad", "DELETE", "old.process_id"),
+    ]
+    for guard in [
+        "" if suffix == "ai" else f"WHEN EXISTS (SELECT 1 FROM processes WHERE id IN ({targets}))"
+    ]
+}
+
+# Recalcula o resumo de todos os processos (bancos anteriores às colunas)
+PROCESS_SUMMARY_REFRESH = f"UPDATE processes SET {_DOCUMENTS_SUMMARY}, {_DEADLINES_SUMMARY}"
+
+
+def create_process_summary(engine):
+    """
+    (Re)cria os triggers do resumo por processo e recalcula o resumo de todos.
+    
+    Os triggers são recriados para que mudanças no DDL cheguem a bancos
+    existentes quando SCHEMA_VERSION é incrementada.
+    
+    Args:
+        engine: Engine do SQLAlchemy
+    """
+    with engine.begin() as conn:
+        for name, ddl in PROCESS_SUMMARY_TRIGGERS.items():
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+            conn.execute(text(ddl))
+        conn.execute(text(PROCESS_SUMMARY_REFRESH))
+
+
+def has_delete_cascade(connection, table: str, referred: str = "processes") -> bool:
+    """
+    Indica se a chave estrangeira de table para referred tem ON DELETE CASCADE.
+    
+    Bancos criados antes do CASCADE continuam com a chave sem ação.
+    
+    Args:
+        connection: Conexão do SQLAlchemy
+        table: Tabela filha
+        referred: Tabela referenciada
+    
+    Returns:
+        True se a exclusão do pai apaga as filhas
+    """
+    rows = connection.exec_driver_sql(f"PRAGMA foreign_key_list({table})").all()
+    return any(row.table == referred and row.on_delete.upper() == "CASCADE" for row in rows)
+
+
+# ============ Arquivo Morto (processos encerrados) ============
+
+# Banco SQLite separado para onde o job de arquivamento move os processos
+# encerrados (com checklist e prazos). É anexado (ATTACH) às conexões como
+# schema "archive", então consultas juntam arquivo e tabelas de referência.
+ARCHIVE_SCHEMA = "archive"
+ARCHIVE_DB_PATH = os.getenv("PGR_ARCHIVE_DB") or str(Path(__file__).parent.parent / "data" / "PGR-arquivo.db")
+
+# Status finais: processos neles (ou com closed_date) podem ser arquivados
+TERMINAL_STATUSES = ("DEFERIDO", "INDEFERIDO", "CANCELADO")
+
+
+def _archive_table(table: Table, metadata: MetaData, index_column: str) -> Table:
+    """Cópia só com as colunas (sem FKs: as referências ficam no banco principal)."""
+    archived = Table(
+        table.name, metadata,
+        *[Column(col.name, col.type, primary_key=col.primary_key, autoincrement=False)
+          for col in table.columns],
+        schema=ARCHIVE_SCHEMA
     )
+    Index(f"idx_archive_{table.name}_{index_column}", archived.c[index_column])
+    return archived
+
+
+_archive_metadata = MetaData()
+
+# Tabelas do arquivo morto, na ordem de cópia
+ARCHIVE_TABLES = {
+    "processes": _archive_table(Process.__table__, _archive_metadata, "protocol_number"),
+    "process_documents": _archive_table(ProcessDocument.__table__, _archive_metadata, "process_id"),
+    "process_deadlines": _archive_table(ProcessDeadline.__table__, _archive_metadata, "process_id"),
+}
+
+
+def attach_archive(connection, path: str = None, create: bool = False) -> bool:
+    """
+    Anexa o arquivo morto à conexão como schema "archive", se ainda não estiver.
+    
+    ATTACH vale por conexão e não pode rodar no meio de uma transação de
+    escrita: chamar antes de qualquer INSERT/UPDATE/DELETE.
+    
+    Args:
+        connection: Conexão do SQLAlchemy (ex: session.connection())
+        path: Arquivo do banco de arquivo (default: ARCHIVE_DB_PATH)
+        create: Criar o arquivo se não existir (job de arquivamento)
+    
+    Returns:
+        True se o arquivo está anexado
+    """
+    attached = {row[1] for row in connection.exec_driver_sql("PRAGMA database_list")}
+    if ARCHIVE_SCHEMA in attached:
+        return True
+    path = path or ARCHIVE_DB_PATH
+    if not create and not Path(path).exists():
+        return False
+    connection.exec_driver_sql(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (str(path),))
+    return True
+
+
+def create_archive_tables(connection):
+    """
+    Cria as tabelas do arquivo morto e acrescenta colunas novas dos modelos.
+    
+    Args:
+        connection: Conexão com o arquivo já anexado (attach_archive)
+    """
+    inspector = inspect(connection)
+    for name, table in ARCHIVE_TABLES.items():
+        if not inspector.has_table(name, schema=ARCHIVE_SCHEMA):
+            table.create(connection)
+        else:
+            add_missing_columns(connection, table)
+
+
+# ============ Perfil de Conexão SQLite ============
+
+# PRAGMAs aplicados em cada conexão nova, por perfil.
+# - default: diário de rollback do SQLite (leitores bloqueiam escritores e
+#   cada commit faz fsync completo)
+# - performance: WAL (leitores não bloqueiam o escritor), synchronous=NORMAL
+#   (fsync só nos checkpoints do WAL; um commit pode se perder numa queda de
+#   energia, mas o banco nunca corrompe), mmap e cache de páginas maiores
+SQLITE_PROFILES = {
+    "default": {
+        "foreign_keys": "ON",
+    },
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,  # 256 MB de leitura via mmap
+        "cache_size": -64 * 1024,  # 64 MB (negativo = KiB)
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms esperando o lock de escrita antes de "database is locked"
+        "foreign_keys": "ON",
+    },
+}
+
+# Perfil escolhido por variável de ambiente: PGR_SQLITE_PROFILE=default|performance.
+# O padrão mantém a durabilidade de antes (fsync a cada commit); performance
+# é opt-in de quem aceita perder o último commit numa queda de energia.
+SQLITE_PROFILE = os.getenv("PGR_SQLITE_PROFILE", "default")
+
+
+def sqlite_profile_pragmas(profile: str = None) -> dict:
+    """
+    Retorna os PRAGMAs de um perfil de conexão.
+    
+    Args:
+        profile: Nome do perfil (default: SQLITE_PROFILE)
+    
+    Returns:
+        Dicionário {pragma: valor}, na ordem em que são aplicados
+    
+    Raises:
+        ValueError: Perfil desconhecido
+    """
+    profile = profile or SQLITE_PROFILE
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Perfil SQLite desconhecido: {profile} (use {', '.join(SQLITE_PROFILES)})")
+    return SQLITE_PROFILES[profile]
+
+
+def apply_sqlite_profile(engine, profile: str = None):
+    """
+    Aplica os PRAGMAs do perfil em cada conexão nova da engine.
+    
+    PRAGMAs valem por conexão (exceto journal_mode=WAL, que fica gravado no
+    arquivo), por isso são aplicados no evento "connect" do pool. O SQLite
+    vem com foreign_keys desligado; sem ele o ON DELETE CASCADE de
+    process_documents e process_deadlines não tem efeito.
+    
+    Args:
+        engine: Engine síncrona (para AsyncEngine, passar engine.sync_engine)
+        profile: Nome do perfil (default: SQLITE_PROFILE)
+    """
+    pragmas = sqlite_profile_pragmas(profile)
+    
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    
+    event.listen(engine, "connect", on_connect)
+
+
+# ============ Instrumentação SQL ============
+
+class QueryStats:
+    """
+    Statements SQL executados e tempo gasto no banco durante uma requisição.
+    """
+    __slots__ = ("count", "duration", "started")
+    
+    def __init__(self):
+        self.count = 0  # Statements executados
+        self.duration = 0.0  # Segundos dentro do driver
+        self.started = 0.0  # Início do statement em andamento
+
+
+# Estatísticas da requisição atual (None fora de requisições). O objeto é
+# mutável: threads do threadpool recebem uma cópia do contexto e somam nele.
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = query_stats.get()
+    if stats is not None:
+        stats.duration += time.perf_counter() - stats.started
+
+
+def instrument_engine(engine):
+    """
+    Soma em query_stats cada statement executado pela engine e seu tempo.
+    
+    Fora de uma requisição (query_stats vazio) o custo é uma leitura de
+    ContextVar por statement.
+    
+    Args:
+        engine: Engine síncrona (para AsyncEngine, passar engine.sync_engine)
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
 
 
 # ============ Database Setup ============
 
-def get_engine(db_path: str = None):
+def get_database_url(db_path: str = None) -> str:
+    """
+    Retorna a string de conexão do banco (default: PGR_DATABASE_URL ou data/PGR.db na raiz do projeto).
+    
+    Args:
+        db_path: String de conexão do banco (opcional, usa default se None)
+    
+    Returns:
+        String de conexão SQLAlchemy
+    """
+    if db_path is not None:
+        return db_path
+    
+    # Banco definido pelo ambiente (ex: PGR_DATABASE_URL=sqlite:////var/data/PGR.db)
+    env_url = os.getenv("PGR_DATABASE_URL")
+    if env_url:
+        return env_url
+    
+    # Caminho relativo à raiz do projeto: backend/../data/PGR.db
+    project_root = Path(__file__).parent.parent
+    db_dir = project_root / "data"
+    
+    # Criar diretório se não existir
+    db_dir.mkdir(parents=True, exist_ok=True)
+    
+    db_file = db_dir / "PGR.db"
+    return f"sqlite:///{db_file}"
+
+
+def get_engine(db_path: str = None, profile: str = None):
     """
     Cria e retorna a engine do SQLAlchemy.
     
@@ -235,6 +748,7 @@ def get_engine(db_path: str = None):
     
     Args:
         db_path: String de conexão do banco (opcional, usa default se None)
+        profile: Perfil de PRAGMAs (default: PGR_SQLITE_PROFILE, ver SQLITE_PROFILES)
     
     Returns:
         Engine configurada com SQLite
@@ -243,33 +757,185 @@ def get_engine(db_path: str = None):
         engine = get_engine()
         # Usa: sqlite:///data/PGR.db
     """
-    if db_path is None:
-        # Caminho relativo à raiz do projeto: backend/../data/PGR.db
-        from pathlib import Path
-        project_root = Path(__file__).parent.parent
-        db_dir = project_root / "data"
-        
-        # Criar diretório se não existir
-        db_dir.mkdir(parents=True, exist_ok=True)
-        
-        db_file = db_dir / "PGR.db"
-        db_path = f"sqlite:///{db_file}"
-    
     engine = create_engine(
-        db_path,
+        get_database_url(db_path),
         echo=False,  # Set True para debug SQL (mostra todas as queries)
         future=True,  # Usar API do SQLAlchemy 2.0
         connect_args={"check_same_thread": False}  # Necessário para SQLite com threads
     )
+    apply_sqlite_profile(engine, profile)
+    instrument_engine(engine)
+    return engine
+
+
+def get_async_engine(db_path: str = None, profile: str = None, read_only: bool = False):
+    """
+    Cria a engine assíncrona (AsyncEngine) para o modo PGR_ASYNC_DB.
+    
+    Usa o driver aiosqlite, que é opcional: instale com `pip install aiosqlite`.
+    
+    Args:
+        db_path: String de conexão síncrona (sqlite:///...), opcional
+        profile: Perfil de PRAGMAs (default: PGR_SQLITE_PROFILE)
+        read_only: Liga PRAGMA query_only (réplicas de leitura)
+    
+    Returns:
+        AsyncEngine apontando para o mesmo banco de get_engine(db_path)
+    
+    Raises:
+        RuntimeError: aiosqlite não instalado
+    """
+    try:
+        import aiosqlite  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Modo assíncrono requer o pacote aiosqlite (pip install aiosqlite)")
+    
+    url = get_database_url(db_path).replace("sqlite://", "sqlite+aiosqlite://", 1)
+    engine = create_async_engine(url, echo=False)
+    apply_sqlite_profile(engine.sync_engine, profile)
+    if read_only:
+        apply_query_only(engine.sync_engine)
+    instrument_engine(engine.sync_engine)
     return engine
 
 
+def get_async_session(engine):
+    """
+    Cria e retorna uma nova sessão assíncrona (AsyncSession).
+    
+    expire_on_commit=False evita recarregar atributos depois do commit, o que
+    no modo assíncrono exigiria um await implícito.
+    
+    Args:
+        engine: AsyncEngine criada por get_async_engine
+    
+    Returns:
+        AsyncSession configurada
+    """
+    SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    return SessionLocal()
+
+
+# ============ Versão do Esquema ============
+
+# Escopo de data_versions com a versão do esquema aplicada ao banco
+SCHEMA_SCOPE = "schema"
+
+# Versão do esquema (tabelas, índices, FTS5 e triggers deste módulo).
+# Incrementar a cada mudança nos modelos ou no DDL para que a próxima
+# inicialização aplique o que falta; com a versão igual, o boot custa uma query.
+SCHEMA_VERSION = 6
+
+
+def backfill_deadline_start_dates(connection):
+    """
+    Preenche start_date dos prazos gravados antes da coluna existir.
+    
+    Só as regras contadas do cadastro têm a data de início conhecida (a data
+    de criação do processo); as demais ficam sem start_date até o motor de
+    prazos recalculá-las no próximo evento.
+    
+    Args:
+        connection: Conexão do SQLAlchemy
+    """
+    connection.execute(text("""
+        UPDATE process_deadlines
+        SET start_date = (SELECT created_date FROM processes WHERE processes.id = process_deadlines.process_id)
+        WHERE start_date IS NULL
+          AND legal_deadline_id IN (SELECT id FROM legal_deadlines WHERE start_event = 'created_date')
+    """))
+
+
+def enable_process_autoincrement(engine):
+    """
+    Recria processes com AUTOINCREMENT em bancos criados antes dele.
+    
+    Sem AUTOINCREMENT o SQLite dá ao próximo processo o maior ID + 1, então
+    IDs de processos excluídos ou arquivados podem voltar. A tabela é
+    reconstruída (nova tabela, cópia, DROP e RENAME, com chaves estrangeiras
+    desligadas) numa única transação, e sqlite_sequence parte do maior ID do
+    banco principal ou do arquivo morto. Índices e triggers de processes e
+    os triggers de resumo são recriados em seguida por create_tables.
+    
+    Args:
+        engine: Engine do SQLAlchemy
+    """
+    with engine.connect() as conn:
+        ddl = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'processes'"
+        )).scalar()
+        if ddl is None or "AUTOINCREMENT" in ddl.upper():
+            return
+        last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM processes")).scalar()
+        if attach_archive(conn) and inspect(conn).has_table("processes", schema=ARCHIVE_SCHEMA):
+            archived = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {ARCHIVE_SCHEMA}.processes")).scalar()
+            last_id = max(last_id, archived)
+        has_search_index = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'processes_fts'"
+        )).first() is not None
+    
+    table = Process.__table__
+    columns = ", ".join(col.name for col in table.columns)
+    create = str(CreateTable(table).compile(dialect=engine.dialect)).replace(
+        "CREATE TABLE processes ", "CREATE TABLE processes_new ", 1
+    )
+    # Triggers dos filhos citam processes e impediriam o RENAME
+    drop_triggers = "".join(f"DROP TRIGGER IF EXISTS {name};\n" for name in PROCESS_SUMMARY_TRIGGERS)
+    search_triggers = [ddl for ddl in SEARCH_INDEX_DDL if "CREATE TRIGGER" in ddl] if has_search_index else []
+    script = f"""
+        PRAGMA foreign_keys = OFF;
+        BEGIN;
+        {drop_triggers}
+        {create};
+        INSERT INTO processes_new ({columns}) SELECT {columns} FROM processes;
+        DROP TABLE processes;
+        ALTER TABLE processes_new RENAME TO processes;
+        DELETE FROM sqlite_sequence WHERE name = 'processes';
+        INSERT INTO sqlite_sequence (name, seq) VALUES ('processes', {int(last_id)});
+        {";".join(search_triggers)};
+        COMMIT;
+    """
+    raw = engine.raw_connection()
+    try:
+        dbapi_connection = raw.driver_connection
+        try:
+            dbapi_connection.executescript(script)
+        except Exception:
+            dbapi_connection.rollback()
+            raise
+        finally:
+            dbapi_connection.execute("PRAGMA foreign_keys = ON")
+    finally:
+        raw.close()
+
+
+def add_missing_columns(connection, table: Table):
+    """
+    Acrescenta (ALTER TABLE ADD COLUMN) as colunas do modelo que faltam no banco.
+    
+    create_all não altera tabelas existentes; colunas novas precisam ser
+    anuláveis ou ter server_default.
+    
+    Args:
+        connection: Conexão do SQLAlchemy
+        table: Tabela do modelo (com schema, para tabelas de banco anexado)
+    """
+    existing = {col["name"] for col in inspect(connection).get_columns(table.name, schema=table.schema)}
+    compiler = connection.dialect.ddl_compiler(connection.dialect, None)
+    name = f"{table.schema}.{table.name}" if table.schema else table.name
+    for col in table.columns:
+        if col.name not in existing:
+            connection.exec_driver_sql(f"ALTER TABLE {name} ADD COLUMN {compiler.get_column_specification(col)}")
+
+
 def create_tables(engine):
     """
     Cria todas as tabelas no banco de dados.
     
     Deve ser chamado uma vez na inicialização da aplicação.
     É seguro chamar múltiplas vezes (não sobrescreve dados existentes).
+    Em bancos antigos acrescenta colunas e índices novos e recalcula o
+    resumo por processo. Ao final grava SCHEMA_VERSION no banco.
     
     Args:
         engine: Engine do SQLAlchemy
@@ -279,6 +945,129 @@ def create_tables(engine):
         create_tables(engine)
     """
     Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            add_missing_columns(conn, table)
+        backfill_deadline_start_dates(conn)
+    enable_process_autoincrement(engine)
+    create_missing_indexes(engine)
+    create_search_index(engine)
+    create_reference_triggers(engine)
+    create_process_summary(engine)
+    
+    stmt = sqlite_insert(DataVersion).values(scope=SCHEMA_SCOPE, version=SCHEMA_VERSION)
+    with engine.begin() as conn:
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=[DataVersion.scope],
+            set_={"version": SCHEMA_VERSION}
+        ))
+
+
+def ensure_schema(engine) -> bool:
+    """
+    Aplica o esquema só se a versão gravada no banco for diferente de SCHEMA_VERSION.
+    
+    Confere a versão com um único SELECT; create_all (reflexão e DDL de cada
+    tabela, índice e trigger) só roda em banco novo ou desatualizado.
+    Usado na inicialização (lifespan) da API.
+    
+    Args:
+        engine: Engine do SQLAlchemy
+    
+    Returns:
+        True se o esquema foi (re)aplicado
+    """
+    try:
+        with engine.connect() as conn:
+            current = conn.execute(data_version_select(SCHEMA_SCOPE)).scalar()
+    except OperationalError:
+        current = None  # Banco novo: data_versions ainda não existe
+    
+    if current == SCHEMA_VERSION:
+        return False
+    create_tables(engine)
+    return True
+
+
+def create_missing_indexes(engine):
+    """
+    Cria os índices dos modelos que ainda não existem no banco.
+    
+    create_all só cria índices junto com tabelas novas; bancos antigos
+    recebem aqui os índices acrescentados depois. Se um índice único não
+    puder ser criado por haver linhas duplicadas, o banco continua
+    funcionando sem ele e um aviso é emitido.
+    
+    Args:
+        engine: Engine do SQLAlchemy
+    """
+    existing = {
+        table: {index["name"] for index in inspect(engine).get_indexes(table)}
+        for table in Base.metadata.tables
+    }
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in existing[table.name]:
+                continue
+            try:
+                with engine.begin() as conn:
+                    index.create(conn)
+            except IntegrityError:
+                warnings.warn(
+                    f"Índice único {index.name} não criado: há linhas duplicadas em {table.name}",
+                    RuntimeWarning
+                )
+
+
+def bump_data_version(session, scope: str = "global") -> int:
+    """
+    Incrementa o contador de versão dos dados na transação atual.
+    
+    Deve ser chamado por todo caminho de escrita em processos antes do commit.
+    Como o SQLite serializa escritas, o valor retornado é único e crescente.
+    
+    Args:
+        session: Sessão do banco (a alteração é confirmada no commit dela)
+        scope: Escopo do contador (default: global)
+    
+    Returns:
+        Nova versão
+    """
+    stmt = sqlite_insert(DataVersion).values(scope=scope, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DataVersion.scope],
+        set_={"version": DataVersion.version + 1}
+    )
+    session.execute(stmt)
+    return get_data_version(session, scope)
+
+
+def get_data_version(session, scope: str = "global") -> int:
+    """
+    Lê o contador de versão dos dados com um único SELECT (sem ORM).
+    
+    Args:
+        session: Sessão ou conexão do banco
+        scope: Escopo do contador (default: global)
+    
+    Returns:
+        Versão atual (0 se nunca houve escrita)
+    """
+    version = session.execute(data_version_select(scope)).scalar()
+    return version or 0
+
+
+def data_version_select(scope: str = "global"):
+    """
+    SELECT do contador de versão (compartilhado pelos modos síncrono e assíncrono).
+    
+    Args:
+        scope: Escopo do contador (default: global)
+    
+    Returns:
+        Select de DataVersion.version
+    """
+    return select(DataVersion.version).where(DataVersion.scope == scope)
 
 
 def get_session(engine):
@@ -295,6 +1084,105 @@ def get_session(engine):
     return SessionLocal()
 
 
+# ============ Roteamento Leitura/Escrita ============
+
+# Réplicas de leitura, separadas por vírgula: cópias SQLite do banco
+# (scripts/refresh_read_replica.py). Só URLs sqlite:/// são aceitas, porque
+# as réplicas usam PRAGMA query_only e, no modo assíncrono, o aiosqlite.
+# Ex: PGR_READ_REPLICAS=sqlite:///data/PGR-leitura.db
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("PGR_READ_REPLICAS", "").split(",") if url.strip()]
+
+
+def get_read_engine(db_path: str, profile: str = None):
+    """
+    Cria a engine de uma réplica de leitura.
+    
+    Além do perfil de conexão, cada conexão recebe PRAGMA query_only: uma
+    escrita roteada por engano para a réplica falha em vez de divergir do
+    primário.
+    
+    Args:
+        db_path: String de conexão da réplica (sqlite:///...)
+        profile: Perfil de PRAGMAs (default: PGR_SQLITE_PROFILE)
+    
+    Returns:
+        Engine somente leitura
+    
+    Raises:
+        ValueError: URL que não é de um banco SQLite
+    """
+    if make_url(db_path).get_backend_name() != "sqlite":
+        raise ValueError(f"Réplica de leitura não suportada: {db_path} (PGR_READ_REPLICAS aceita só sqlite:///)")
+    engine = get_engine(db_path, profile)
+    apply_query_only(engine)
+    return engine
+
+
+def apply_query_only(engine):
+    """
+    Liga PRAGMA query_only em cada conexão nova (réplicas de leitura).
+    
+    Args:
+        engine: Engine síncrona (para AsyncEngine, passar engine.sync_engine)
+    """
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    
+    event.listen(engine, "connect", on_connect)
+
+
+class EngineRouter:
+    """
+    Escolhe a engine de cada requisição: escritas no primário, leituras nas réplicas.
+    
+    Sem réplicas configuradas, tudo vai para o primário. As réplicas são
+    usadas em rodízio; para ler as próprias escritas, quem chama informa a
+    versão global mínima (data_versions) que a leitura precisa enxergar e a
+    réplica só é usada se já estiver nela.
+    """
+    
+    def __init__(self, primary, replicas=()):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self._turn = itertools.count()
+    
+    def for_write(self):
+        """Engine para escritas (primário)."""
+        return self.primary
+    
+    def for_read(self, min_version: int = 0):
+        """
+        Engine para leituras.
+        
+        Args:
+            min_version: Versão global que a leitura precisa enxergar
+                (0: qualquer réplica serve)
+        
+        Returns:
+            Próxima réplica do rodízio, ou o primário se não houver réplicas
+            ou se a réplica ainda não chegou em min_version
+        """
+        if not self.replicas:
+            return self.primary
+        replica = self.replicas[next(self._turn) % len(self.replicas)]
+        if min_version and self.version(replica) < min_version:
+            return self.primary
+        return replica
+    
+    @staticmethod
+    def version(engine) -> int:
+        """Versão global dos dados vista por uma engine."""
+        with engine.connect() as conn:
+            return conn.execute(data_version_select()).scalar() or 0
+    
+    def dispose(self):
+        """Fecha os pools de conexão do primário e das réplicas."""
+        for engine in [self.primary, *self.replicas]:
+            engine.dispose()
+
+
 # ============ Dependency Injection (para FastAPI) ============
 
 def get_db():
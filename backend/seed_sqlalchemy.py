@@ -4,6 +4,7 @@ Script para popular o banco de dados SQLAlchemy com dados iniciais.
 Cria tipos de processo, status, documentos e prazos legais.
 """
 import models_sqlalchemy as models
+from business_calendar import brazilian_national_holidays
 from datetime import date
 
 def seed_database():
@@ -168,6 +169,38 @@ def seed_database():
         )
         db.add(prazo_compl)
         
+        # Prazos disparados por eventos (motor de prazos): documentação completa e status
+        prazo_analise = models.LegalDeadline(
+            type_id=None,
+            name="Análise após documentação completa",
+            days_limit=30,
+            start_event="document_complete",
+            is_business_days=True,
+            description="Prazo para análise a partir da entrega do último documento obrigatório"
+        )
+        db.add(prazo_analise)
+        
+        prazo_pendencia = models.LegalDeadline(
+            type_id=None,
+            name="Manifestação sobre pendência documental",
+            days_limit=10,
+            start_event="status:PENDENTE_DOCS",
+            is_business_days=True,
+            description="Prazo contado da mudança para Pendente de Documentos"
+        )
+        db.add(prazo_pendencia)
+        
+        db.commit()
+        
+        # ============ 5.1 Feriados Nacionais ============
+        print("Criando feriados nacionais...")
+        
+        existing_holidays = {h.holiday_date for h in db.query(models.Holiday).all()}
+        for year in range(2025, date.today().year + 2):
+            for holiday_date, name in brazilian_national_holidays(year):
+                if holiday_date not in existing_holidays:
+                    db.add(models.Holiday(holiday_date=holiday_date, name=name, scope="NACIONAL"))
+        
         db.commit()
         
         # ============ 6. Processos de Exemplo ============
@@ -238,7 +271,8 @@ def seed_database():
         print(f"  - 2 tipos de processo")
         print(f"  - 7 status")
         print(f"  - 7 documentos")
-        print(f"  - 4 prazos legais")
+        print(f"  - 6 prazos legais")
+        print(f"  - feriados nacionais de 2025 a {date.today().year + 1}")
         print(f"  - 4 processos de exemplo")
         
     except Exception as e:
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Move processos encerrados há mais de N dias para o arquivo morto.
+
+Copia processos, checklist e prazos para data/PGR-arquivo.db (ou
+PGR_ARCHIVE_DB) e os remove do banco principal, em blocos de uma transação
+cada. Os detalhes continuam disponíveis em GET /processes/{protocol}. Rode
+periodicamente (cron), de preferência fora do horário de expediente.
+
+Uso:
+    python scripts/archive_processes.py              # encerrados há mais de 365 dias
+    python scripts/archive_processes.py 180 500      # limite em dias e processos por bloco
+"""
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Adicionar raiz do projeto ao path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend import api_sqlalchemy as api  # noqa: E402
+from backend import models_sqlalchemy as models  # noqa: E402
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else api.ARCHIVE_CHUNK_SIZE
+    cutoff = date.today() - timedelta(days=days)
+
+    engine = models.get_engine()
+    models.ensure_schema(engine)
+    db = models.get_session(engine)
+    start = time.perf_counter()
+    try:
+        archived = api.archive_closed_processes(db, cutoff, chunk_size=chunk_size)
+    finally:
+        db.close()
+        engine.dispose()
+
+    print(f"✅ {archived} processos encerrados antes de {cutoff} movidos para "
+          f"{models.ARCHIVE_DB_PATH} ({time.perf_counter() - start:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
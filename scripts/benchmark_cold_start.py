@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização: tempo do boot do worker até a primeira requisição atendida.
+
+Sobe `uvicorn main:app` várias vezes contra um banco temporário
+(PGR_DATABASE_URL) e mede o tempo entre iniciar o processo e o primeiro
+GET /health respondido com 200, em dois cenários:
+
+- Esquema aplicado em todo boot: a versão do esquema é apagada antes de cada
+  subida, então o lifespan roda create_all, índices, FTS5 e triggers (como
+  fazia o import do módulo antes)
+- Versão do esquema igual: o lifespan confere a versão com uma query e segue
+
+Também mede, no próprio processo, create_tables x ensure_schema com uma
+engine nova a cada rodada (como um worker recém-criado).
+
+Uso:
+    python scripts/benchmark_cold_start.py        # 5 subidas por cenário
+    python scripts/benchmark_cold_start.py 10
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# Adicionar raiz do projeto ao path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import delete  # noqa: E402
+
+from backend import models_sqlalchemy as models  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def forget_schema_version(engine):
+    """Apaga a versão do esquema gravada, forçando create_all no próximo boot."""
+    with engine.begin() as conn:
+        conn.execute(delete(models.DataVersion).where(models.DataVersion.scope == models.SCHEMA_SCOPE))
+
+
+def boot_to_first_request(database_url: str, timeout: float = 30) -> float:
+    """Sobe o uvicorn e retorna os segundos até o primeiro GET /health com 200."""
+    port = free_port()
+    env = {**os.environ, "PGR_DATABASE_URL": database_url}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError("Servidor não respondeu a tempo")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def time_in_process(database_url: str, func, rounds: int = 20) -> float:
+    """Tempo médio (ms) de func(engine) com uma engine nova por rodada."""
+    elapsed = []
+    for _ in range(rounds):
+        engine = models.get_engine(database_url)
+        start = time.perf_counter()
+        func(engine)
+        elapsed.append(time.perf_counter() - start)
+        engine.dispose()
+    return statistics.mean(elapsed) * 1000
+
+
+def main():
+    boots = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'cold.db'}"
+        engine = models.get_engine(database_url)
+        models.create_tables(engine)
+
+        print(f"\nBoot do uvicorn até o primeiro GET /health ({boots} subidas por cenário)\n")
+        print(f"{'Cenário':36} {'média (ms)':>11} {'mín (ms)':>9}")
+
+        full = []
+        for _ in range(boots):
+            forget_schema_version(engine)
+            full.append(boot_to_first_request(database_url))
+        matched = [boot_to_first_request(database_url) for _ in range(boots)]
+
+        for name, times in [("Esquema aplicado em todo boot", full), ("Versão do esquema igual", matched)]:
+            print(f"{name:36} {statistics.mean(times) * 1000:>11.0f} {min(times) * 1000:>9.0f}")
+
+        print(f"\n{'No processo (engine nova)':36} {'média (ms)':>11}")
+        print(f"{'create_tables':36} {time_in_process(database_url, models.create_tables):>11.1f}")
+        print(f"{'ensure_schema':36} {time_in_process(database_url, models.ensure_schema):>11.1f}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
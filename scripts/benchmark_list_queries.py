@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark das listagens: caminho ORM antigo x projeção Core (select de colunas).
+
+Cria um banco temporário com N processos (e seus prazos) e mede o tempo de
+montar as respostas de GET /processes (uma página), GET /deadlines/overdue e
+GET /deadlines/upcoming nos dois caminhos.
+
+Uso:
+    python scripts/benchmark_list_queries.py            # 5000 processos
+    python scripts/benchmark_list_queries.py 100000     # tamanho customizado
+"""
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Adicionar raiz do projeto ao path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import insert  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+
+from backend import api_sqlalchemy as api  # noqa: E402
+from backend import models_sqlalchemy as models  # noqa: E402
+
+REPETITIONS = 3
+
+
+def populate(engine, total: int):
+    """Insere tipos, status, prazos legais, `total` processos e seus prazos."""
+    today = date.today()
+    with engine.begin() as conn:
+        conn.execute(insert(models.ProcessType), [
+            {"id": 1, "code": "PROM_CAP", "name": "Promoção por Capacitação Profissional"},
+            {"id": 2, "code": "PROG_MER", "name": "Progressão por Mérito Profissional"},
+        ])
+        conn.execute(insert(models.Status), [
+            {"id": 1, "code": "RECEBIDO", "label": "Recebido"},
+            {"id": 2, "code": "EM_ANALISE", "label": "Em Análise"},
+        ])
+        conn.execute(insert(models.LegalDeadline), [
+            {"id": 1, "type_id": None, "name": "Prazo para instrução inicial", "days_limit": 30,
+             "start_event": "created_date", "is_business_days": False},
+            {"id": 2, "type_id": None, "name": "Prazo para complementação documental", "days_limit": 15,
+             "start_event": "created_date", "is_business_days": True},
+        ])
+        conn.execute(insert(models.Process), [
+            {"id": i, "protocol_number": f"BENCH-{i:07d}", "type_id": 1 + i % 2,
+             "applicant_name": f"Servidor {i}", "created_date": today - timedelta(days=i % 90),
+             "status_id": 1 + i % 2}
+            for i in range(1, total + 1)
+        ])
+        conn.execute(insert(models.ProcessDeadline), [
+            {"process_id": i, "legal_deadline_id": ld, "closed": False, "notified": False,
+             "due_date": today - timedelta(days=i % 90) + timedelta(days=30 if ld == 1 else 21)}
+            for i in range(1, total + 1)
+            for ld in (1, 2)
+        ])
+
+
+# ============ Caminho ORM (implementação anterior) ============
+
+def orm_list_processes(db, limit):
+    query = db.query(models.Process).join(models.ProcessType).join(models.Status)
+    query = query.order_by(models.Process.created_date.desc(), models.Process.id.desc())
+    return [
+        api.ProcessResponseSchema(
+            id=proc.id,
+            protocol_number=proc.protocol_number,
+            type_code=proc.process_type.code,
+            applicant_name=proc.applicant_name,
+            created_date=str(proc.created_date),
+            status_code=proc.status.code,
+            financial_effective_date=str(proc.financial_effective_date) if proc.financial_effective_date else None
+        )
+        for proc in query.limit(limit).all()
+    ]
+
+
+def orm_deadlines(db, start, end):
+    today = date.today()
+    # Joins pelos relacionamentos (o join implícito antigo em LegalDeadline
+    # seguia ProcessType.legal_deadlines e perdia os prazos gerais)
+    deadlines = db.query(models.ProcessDeadline).join(
+        models.ProcessDeadline.process
+    ).join(
+        models.Process.process_type
+    ).join(
+        models.ProcessDeadline.legal_deadline
+    ).filter(
+        models.ProcessDeadline.closed.is_(False),
+        models.ProcessDeadline.due_date >= start,
+        models.ProcessDeadline.due_date <= end
+    ).order_by(
+        models.ProcessDeadline.due_date.asc()
+    ).all()
+    return [
+        {
+            "protocol_number": dl.process.protocol_number,
+            "type_name": dl.process.process_type.name,
+            "deadline_name": dl.legal_deadline.name,
+            "due_date": str(dl.due_date),
+            "days": (dl.due_date - today).days,
+            "notified": dl.notified
+        }
+        for dl in deadlines
+    ]
+
+
+# ============ Medição ============
+
+def measure(engine, func):
+    """Executa func(db) REPETITIONS vezes (sessão nova a cada vez); retorna (melhor tempo, linhas)."""
+    best = None
+    rows = 0
+    for _ in range(REPETITIONS):
+        db = models.get_session(engine)
+        try:
+            start = time.perf_counter()
+            result = func(db)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+        rows = len(result["items"] if isinstance(result, dict) else result)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def blank_request():
+    """Requisição mínima (sem If-None-Match) para chamar os endpoints direto."""
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    today = date.today()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = models.get_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        models.create_tables(engine)
+        print(f"Populando {total} processos...")
+        populate(engine, total)
+
+        cases = [
+            (
+                "GET /processes (página de 1000)",
+                lambda db: orm_list_processes(db, 1000),
+                lambda db: api.list_processes(blank_request(), Response(), type_code=None, status_code=None,
+                                              limit=1000, cursor=None, overdue=False, docs_pending=False,
+                                              sort="created", db=db),
+            ),
+            (
+                "GET /deadlines/overdue",
+                lambda db: orm_deadlines(db, date.min, today - timedelta(days=1)),
+                lambda db: api.list_overdue_deadlines(blank_request(), Response(), db=db),
+            ),
+            (
+                "GET /deadlines/upcoming?days=90",
+                lambda db: orm_deadlines(db, today, today + timedelta(days=90)),
+                lambda db: api.list_upcoming_deadlines(blank_request(), Response(), days=90, db=db),
+            ),
+        ]
+
+        print(f"\n{'Endpoint':34} {'linhas':>7} {'ORM (ms)':>10} {'Core (ms)':>10} {'ganho':>7}")
+        for name, orm_func, core_func in cases:
+            orm_time, rows = measure(engine, orm_func)
+            core_time, _ = measure(engine, core_func)
+            print(f"{name:34} {rows:>7} {orm_time * 1000:>10.1f} {core_time * 1000:>10.1f} "
+                  f"{orm_time / core_time:>6.1f}x")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
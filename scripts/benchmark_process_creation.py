@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cadastro de processos: três commits por processo x unidade de trabalho.
+
+Cria um banco temporário (em disco, para que o custo do fsync de cada commit
+apareça) e mede quantos processos por segundo cada caminho cadastra:
+
+- Anterior: processo, checklist e prazos gravados em três commits
+- add_process: tudo em um único commit por processo (POST /processes)
+- add_process em lote: um único commit para todos (importador de Excel)
+
+Em seguida mede a exclusão em conjunto (delete_processes) de cada lote
+cadastrado: checklist e prazos saem pelo ON DELETE CASCADE e os triggers
+de resumo não recalculam nada por linha filha.
+
+Uso:
+    python scripts/benchmark_process_creation.py          # 500 processos
+    python scripts/benchmark_process_creation.py 2000     # tamanho customizado
+"""
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+# Adicionar raiz do projeto ao path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import insert  # noqa: E402
+
+from backend import api_sqlalchemy as api  # noqa: E402
+from backend import models_sqlalchemy as models  # noqa: E402
+
+PREFIXES = ["ANTES", "UOW", "LOTE"]
+
+
+def populate_reference(engine):
+    """Insere tipos, status, documentos obrigatórios e prazos legais."""
+    with engine.begin() as conn:
+        conn.execute(insert(models.ProcessType), [
+            {"id": 1, "code": "PROM_CAP", "name": "Promoção por Capacitação Profissional"},
+        ])
+        conn.execute(insert(models.Status), [
+            {"id": 1, "code": "RECEBIDO", "label": "Recebido"},
+        ])
+        conn.execute(insert(models.Document), [
+            {"id": i, "code": f"DOC{i}", "name": f"Documento {i}"} for i in range(1, 5)
+        ])
+        conn.execute(insert(models.RequiredDocument), [
+            {"type_id": 1, "document_id": i, "required": True, "doc_order": i} for i in range(1, 5)
+        ])
+        conn.execute(insert(models.LegalDeadline), [
+            {"id": 1, "type_id": None, "name": "Prazo para instrução inicial", "days_limit": 30,
+             "start_event": "created_date", "is_business_days": False},
+            {"id": 2, "type_id": 1, "name": "Análise de capacitação", "days_limit": 30,
+             "start_event": "created_date", "is_business_days": False},
+            {"id": 3, "type_id": None, "name": "Prazo para complementação documental", "days_limit": 15,
+             "start_event": "created_date", "is_business_days": True},
+        ])
+
+
+def new_process(prefix: str, i: int) -> models.Process:
+    return models.Process(
+        protocol_number=f"{prefix}-{i:07d}", type_id=1, status_id=1,
+        applicant_name=f"Servidor {i}", created_date=date.today(), version=0
+    )
+
+
+# ============ Caminho anterior (três commits por processo) ============
+
+def create_three_commits(db, process):
+    db.add(process)
+    db.commit()
+    db.refresh(process)
+
+    for req_doc in db.query(models.RequiredDocument).filter(models.RequiredDocument.type_id == 1).all():
+        db.add(models.ProcessDocument(process_id=process.id, document_id=req_doc.document_id,
+                                      required=req_doc.required, provided=False))
+    db.commit()
+
+    legal_deadlines = db.query(models.LegalDeadline).filter(
+        (models.LegalDeadline.type_id == 1) | (models.LegalDeadline.type_id.is_(None))
+    ).all()
+    for legal_dl in legal_deadlines:
+        due = api.calculate_due_date(process.created_date, legal_dl.days_limit, legal_dl.is_business_days)
+        db.add(models.ProcessDeadline(process_id=process.id, legal_deadline_id=legal_dl.id,
+                                      due_date=due, notified=False, closed=False))
+    db.commit()
+
+
+# ============ Medição ============
+
+def run_before(db, total):
+    for i in range(total):
+        create_three_commits(db, new_process("ANTES", i))
+
+
+def run_unit_of_work(db, total):
+    for i in range(total):
+        api.add_process(db, new_process("UOW", i), 1, date.today())
+        db.commit()
+
+
+def run_batch(db, total):
+    for i in range(total):
+        api.add_process(db, new_process("LOTE", i), 1, date.today())
+    db.commit()
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = models.get_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        models.create_tables(engine)
+        populate_reference(engine)
+
+        cases = [
+            ("Anterior (3 commits/processo)", run_before),
+            ("add_process (1 commit/processo)", run_unit_of_work),
+            ("add_process em lote (1 commit)", run_batch),
+        ]
+
+        print(f"\nCadastrando {total} processos por caminho (checklist de 4 documentos, 3 prazos)\n")
+        print(f"{'Caminho':34} {'tempo (s)':>10} {'processos/s':>12}")
+        baseline = None
+        for name, func in cases:
+            db = models.get_session(engine)
+            try:
+                start = time.perf_counter()
+                func(db, total)
+                elapsed = time.perf_counter() - start
+            finally:
+                db.close()
+            rate = total / elapsed
+            baseline = baseline or rate
+            print(f"{name:34} {elapsed:>10.2f} {rate:>12.0f}  ({rate / baseline:.1f}x)")
+
+        print(f"\nExcluindo cada lote de {total} processos em conjunto (1 commit)\n")
+        print(f"{'Lote':34} {'tempo (s)':>10} {'processos/s':>12}")
+        for prefix in PREFIXES:
+            db = models.get_session(engine)
+            try:
+                start = time.perf_counter()
+                deleted = api.delete_processes(db, models.Process.protocol_number.like(f"{prefix}-%"))
+                db.commit()
+                elapsed = time.perf_counter() - start
+            finally:
+                db.close()
+            print(f"{prefix:34} {elapsed:>10.2f} {len(deleted) / elapsed:>12.0f}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência leitura/escrita por perfil de conexão SQLite.
+
+Para cada perfil de models.SQLITE_PROFILES cria um banco temporário em disco,
+cadastra uma base inicial de processos e, durante alguns segundos, roda ao
+mesmo tempo um escritor (um processo por commit, como POST /processes) e
+vários leitores (página da listagem de processos). Mostra escritas/s,
+leituras/s, latência das leituras e quantas operações falharam com
+"database is locked".
+
+Uso:
+    python scripts/benchmark_sqlite_profile.py              # 5 s, 4 leitores
+    python scripts/benchmark_sqlite_profile.py 10 8         # duração e nº de leitores
+"""
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+# Adicionar raiz do projeto ao path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "scripts"))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from backend import api_sqlalchemy as api  # noqa: E402
+from backend import models_sqlalchemy as models  # noqa: E402
+from benchmark_process_creation import new_process, populate_reference  # noqa: E402
+
+INITIAL_PROCESSES = 5000
+
+
+def writer(engine, stop, stats):
+    """Cadastra processos, um commit por processo, até o sinal de parada."""
+    db = models.get_session(engine)
+    i = 0
+    try:
+        while not stop.is_set():
+            try:
+                api.add_process(db, new_process("W", i), 1, date.today())
+                db.commit()
+                stats["writes"] += 1
+                i += 1
+            except OperationalError:
+                db.rollback()
+                stats["write_errors"] += 1
+    finally:
+        db.close()
+
+
+def reader(engine, stop, stats):
+    """Lê a primeira página da listagem de processos em laço."""
+    stmt = api.process_page_select(None, None, 50, None)
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(stmt).all()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            stats["read_errors"] += 1
+    stats["latencies"].extend(latencies)
+
+
+def run_profile(profile, duration, readers):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = models.get_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", profile=profile)
+        models.create_tables(engine)
+        populate_reference(engine)
+
+        db = models.get_session(engine)
+        for i in range(INITIAL_PROCESSES):
+            api.add_process(db, new_process("BASE", i), 1, date.today())
+        db.commit()
+        db.close()
+
+        stats = {"writes": 0, "write_errors": 0, "read_errors": 0, "latencies": []}
+        stop = threading.Event()
+        threads = [threading.Thread(target=writer, args=(engine, stop, stats))]
+        threads += [threading.Thread(target=reader, args=(engine, stop, stats)) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        engine.dispose()
+        return stats
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"\n{duration:.0f} s com 1 escritor e {readers} leitores "
+          f"(base de {INITIAL_PROCESSES} processos)\n")
+    print(f"{'Perfil':12} {'escritas/s':>10} {'leituras/s':>10} {'p50 (ms)':>9} "
+          f"{'p99 (ms)':>9} {'máx (ms)':>9} {'locked':>7}")
+    for profile in models.SQLITE_PROFILES:
+        stats = run_profile(profile, duration, readers)
+        latencies = sorted(stats["latencies"]) or [0.0]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{profile:12} {stats['writes'] / duration:>10.0f} {len(stats['latencies']) / duration:>10.0f} "
+              f"{statistics.median(latencies) * 1000:>9.1f} {p99 * 1000:>9.1f} {latencies[-1] * 1000:>9.1f} "
+              f"{stats['write_errors'] + stats['read_errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ sys.path.insert(0, str(project_root))
 
 import pandas as pd  # noqa: E402
 from backend.models_sqlalchemy import (  # noqa: E402
-    get_engine, get_session, Process, ProcessType, Status
+    get_engine, get_session, bump_data_version, Process, ProcessType, Status
 )
 
 
@@ -137,6 +137,20 @@ def import_from_excel(excel_path: str, sheet_name: str | int = 0, dry_run: bool
     print(f"\n📦 Tipos disponíveis: {', '.join(types_map.keys())}")
     print(f"📦 Status disponíveis: {', '.join(status_map.keys())}\n")
     
+    # Nova versão dos dados para esta importação (invalida ETags da API)
+    version = bump_data_version(session) if not dry_run else 0
+    
+    # Protocolos da planilha que já estão no banco (uma única consulta)
+    sheet_protocols = {str(value).strip() for value in df[mapping['protocol']].dropna()}
+    existing_protocols = {
+        protocol for (protocol,) in session.query(Process.protocol_number).filter(
+            Process.protocol_number.in_(sheet_protocols)
+        )
+    }
+    
+    # Mesma unidade de trabalho do endpoint POST /processes
+    from backend.api_sqlalchemy import add_process
+    
     # 4. Processar cada linha
     imported = 0
     skipped = 0
@@ -152,9 +166,8 @@ def import_from_excel(excel_path: str, sheet_name: str | int = 0, dry_run: bool
                 skipped += 1
                 continue
             
-            # Verificar se já existe
-            existing = session.query(Process).filter_by(protocol_number=protocol).first()
-            if existing:
+            # Verificar se já existe (no banco ou em linha anterior da planilha)
+            if protocol in existing_protocols:
                 print(f"⏭️  {protocol}: Já existe, pulando...")
                 skipped += 1
                 continue
@@ -229,23 +242,19 @@ def import_from_excel(excel_path: str, sheet_name: str | int = 0, dry_run: bool
                 applicant_registration=registration,
                 created_date=created_date,
                 financial_effective_date=financial_date,
-                parecer=parecer
+                parecer=parecer,
+                version=version
             )
             
             if dry_run:
                 print(f"✓ {protocol} - {applicant} ({type_code}) [{status_code}]")
             else:
-                session.add(new_process)
-                session.flush()  # Para obter o ID
-                
-                # Criar checklist automático (igual ao endpoint POST)
-                from backend.api_sqlalchemy import create_process_checklist, create_process_deadlines
-                create_process_checklist(session, new_process.id, types_map[type_code].id)
-                if created_date:
-                    create_process_deadlines(session, new_process.id, types_map[type_code].id, created_date)
+                # Processo + checklist + prazos, gravados no commit final
+                add_process(session, new_process, types_map[type_code].id, created_date, status_code)
                 
-                print(f"✅ {protocol} - {applicant} (ID: {new_process.id})")
+                print(f"✅ {protocol} - {applicant}")
             
+            existing_protocols.add(protocol)
             imported += 1
             
         except Exception as e:
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Cadastra os feriados nacionais e recalcula os prazos em aberto.
+
+Feriados estaduais e municipais podem ser incluídos direto na tabela
+holidays (scope ESTADUAL/MUNICIPAL); depois rode este script de novo para
+recalcular os vencimentos.
+
+Uso:
+    python scripts/load_holidays.py              # ano atual e o seguinte
+    python scripts/load_holidays.py 2025 2030    # intervalo de anos
+"""
+import sys
+from datetime import date
+from pathlib import Path
+
+# Adicionar raiz do projeto ao path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend import models_sqlalchemy as models  # noqa: E402
+from backend.api_sqlalchemy import recompute_deadlines  # noqa: E402
+from backend.business_calendar import brazilian_national_holidays  # noqa: E402
+
+
+def load_holidays(first_year: int, last_year: int):
+    engine = models.get_engine()
+    models.create_tables(engine)
+    session = models.get_session(engine)
+
+    try:
+        existing = {d for (d,) in session.query(models.Holiday.holiday_date)}
+        added = 0
+        for year in range(first_year, last_year + 1):
+            for holiday_date, name in brazilian_national_holidays(year):
+                if holiday_date not in existing:
+                    session.add(models.Holiday(holiday_date=holiday_date, name=name, scope="NACIONAL"))
+                    added += 1
+        session.flush()
+
+        changed = recompute_deadlines(session)
+        session.commit()
+        print(f"✅ {added} feriado(s) cadastrado(s) ({first_year}-{last_year})")
+        print(f"📅 {changed} prazo(s) em aberto com vencimento recalculado")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Erro: {e}")
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    today = date.today()
+    first = int(sys.argv[1]) if len(sys.argv) > 1 else today.year
+    last = int(sys.argv[2]) if len(sys.argv) > 2 else first + 1
+    load_holidays(first, last)
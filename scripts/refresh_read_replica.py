@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Atualiza a cópia local de leitura do banco (réplica SQLite).
+
+Copia data/PGR.db para a réplica com a API de backup do SQLite, que gera
+um snapshot consistente mesmo com a API gravando no primário. Rode
+periodicamente (cron) e aponte a API para a cópia:
+
+    PGR_READ_REPLICAS=sqlite:///data/PGR-leitura.db uvicorn backend.api_sqlalchemy:app
+
+Uso:
+    python scripts/refresh_read_replica.py                       # data/PGR-leitura.db
+    python scripts/refresh_read_replica.py /caminho/replica.db   # destino customizado
+"""
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Adicionar raiz do projeto ao path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend import models_sqlalchemy as models  # noqa: E402
+
+
+def refresh_read_replica(replica_path: Path):
+    primary_path = models.get_database_url().replace("sqlite:///", "", 1)
+    start = time.perf_counter()
+
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(str(replica_path))
+    try:
+        # Cópia em blocos de páginas: o primário fica livre para escritas entre os blocos
+        source.backup(target, pages=1024)
+        version = target.execute(
+            "SELECT version FROM data_versions WHERE scope = 'global'"
+        ).fetchone()
+    finally:
+        target.close()
+        source.close()
+
+    print(f"✅ Réplica atualizada: {replica_path} (versão {version[0] if version else 0}, "
+          f"{time.perf_counter() - start:.2f} s)")
+
+
+if __name__ == "__main__":
+    default = project_root / "data" / "PGR-leitura.db"
+    refresh_read_replica(Path(sys.argv[1]) if len(sys.argv) > 1 else default)
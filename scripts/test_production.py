@@ -106,8 +106,8 @@ success, response = test_endpoint(
 
 if success and response:
     try:
-        processes = response.json()
-        print(f"   📊 Total de processos: {len(processes)}")
+        processes = response.json()['items']
+        print(f"   📊 Processos na primeira página: {len(processes)}")
         if processes:
             print(f"   📋 Primeiro processo: {processes[0]['protocol_number']}")
         print()
@@ -3,58 +3,65 @@
 Atualiza os status dos processos de teste para popular o dashboard
 """
 
-from backend.models_sqlalchemy import get_session, Process
-from datetime import datetime, timedelta
+from backend.models_sqlalchemy import get_session, Process, Status, bump_data_version
+from datetime import date, timedelta
+from sqlalchemy import select, update
+
+# Status de destino -> {protocolo: dias desde a criação}
+TEST_PROCESSES = {
+    "EM_ANALISE": {
+        # Prazos vencidos (45-55 dias atrás)
+        'PGR-2025-0500': 45, 'PGR-2025-0501': 50, 'PGR-2025-0502': 55,
+        # Prazos próximos (25-27 dias atrás)
+        'PGR-2025-0503': 25, 'PGR-2025-0504': 26, 'PGR-2025-0505': 27,
+        # Em análise recentes
+        'PGR-2025-0506': 10, 'PGR-2025-0507': 10, 'PGR-2025-0508': 10, 'PGR-2025-0509': 10,
+    },
+    # Pendentes de documentos
+    "PENDENTE_DOCS": {'PGR-2025-0510': 5, 'PGR-2025-0511': 5, 'PGR-2025-0512': 5, 'PGR-2025-0513': 5},
+    # Completo
+    "COMPLETO": {'PGR-2025-0514': 2},
+}
+
 
 def update_test_processes():
     from backend.models_sqlalchemy import get_engine
+    from backend.api_sqlalchemy import recompute_deadlines, transition_status
     session = get_session(get_engine())
-    
-    # Processos para prazos vencidos (45-60 dias atrás)
-    vencidos = ['PGR-2025-0500', 'PGR-2025-0501', 'PGR-2025-0502']
-    for protocol in vencidos:
-        p = session.query(Process).filter_by(protocol_number=protocol).first()
-        if p:
-            p.status_code = 'EM_ANALISE'
-            days_ago = 45 + vencidos.index(protocol) * 5
-            p.created_date = (datetime.now() - timedelta(days=days_ago)).date()
-            print(f"✅ {protocol}: EM_ANALISE, {days_ago} dias atrás")
-    
-    # Processos para prazos próximos (25-28 dias atrás)
-    proximos = ['PGR-2025-0503', 'PGR-2025-0504', 'PGR-2025-0505']
-    for protocol in proximos:
-        p = session.query(Process).filter_by(protocol_number=protocol).first()
-        if p:
-            p.status_code = 'EM_ANALISE'
-            days_ago = 25 + proximos.index(protocol)
-            p.created_date = (datetime.now() - timedelta(days=days_ago)).date()
-            print(f"✅ {protocol}: EM_ANALISE, {days_ago} dias atrás")
-    
-    # Processos em análise (recentes)
-    em_analise = ['PGR-2025-0506', 'PGR-2025-0507', 'PGR-2025-0508', 'PGR-2025-0509']
-    for protocol in em_analise:
-        p = session.query(Process).filter_by(protocol_number=protocol).first()
-        if p:
-            p.status_code = 'EM_ANALISE'
-            p.created_date = (datetime.now() - timedelta(days=10)).date()
-            print(f"✅ {protocol}: EM_ANALISE, 10 dias atrás")
-    
-    # Processos pendente de documentos
-    pendentes = ['PGR-2025-0510', 'PGR-2025-0511', 'PGR-2025-0512', 'PGR-2025-0513']
-    for protocol in pendentes:
-        p = session.query(Process).filter_by(protocol_number=protocol).first()
-        if p:
-            p.status_code = 'PENDENTE_DOCS'
-            p.created_date = (datetime.now() - timedelta(days=5)).date()
-            print(f"✅ {protocol}: PENDENTE_DOCS, 5 dias atrás")
-    
-    # Processo completo
-    p = session.query(Process).filter_by(protocol_number='PGR-2025-0514').first()
-    if p:
-        p.status_code = 'COMPLETO'
-        p.created_date = (datetime.now() - timedelta(days=2)).date()
-        print(f"✅ PGR-2025-0514: COMPLETO, 2 dias atrás")
-    
+    today = date.today()
+
+    # A versão nova invalida ETags e o cache dos clientes
+    status_ids = dict(session.execute(select(Status.code, Status.id)).all())
+    version = bump_data_version(session)
+
+    protocols = [protocol for group in TEST_PROCESSES.values() for protocol in group]
+    rows = {
+        row.protocol_number: row
+        for row in session.execute(
+            select(Process.id, Process.protocol_number, Process.type_id, Process.status_id)
+            .where(Process.protocol_number.in_(protocols))
+        )
+    }
+
+    for status_code, days_by_protocol in TEST_PROCESSES.items():
+        group = [rows[protocol] for protocol in days_by_protocol if protocol in rows]
+        if not group:
+            continue
+
+        # Datas de criação: UPDATE em lote por chave primária
+        session.execute(update(Process), [
+            {"id": row.id, "created_date": today - timedelta(days=days_by_protocol[row.protocol_number])}
+            for row in group
+        ])
+
+        # Status: um UPDATE por status + prazos status:<CODE> (motor de prazos)
+        transition_status(session, group, status_code, status_ids[status_code], version, today)
+        for row in group:
+            print(f"✅ {row.protocol_number}: {status_code}, {days_by_protocol[row.protocol_number]} dias atrás")
+
+    # Prazos contados da criação acompanham as novas datas
+    recompute_deadlines(session)
+
     session.commit()
     print("\n✅ Status atualizados com sucesso!")
     session.close()